@@ -0,0 +1,24 @@
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from jobs.queue import task
+from shoestore.mail import send_email
+
+from .models import User
+
+
+@task
+def send_signup_verification(user_id, signup_link):
+    """Email a new user their verification link (Resend)."""
+    user = User.objects.get(pk=user_id)
+    html_content = render_to_string("emails/signup_verification.html", {
+        "user": user,
+        "signup_link": signup_link,
+    })
+    send_email({
+        "from": "noreply@rareleather.com.ng",
+        "to": [user.email],
+        "subject": "Verify your email - Welcome to Rare Leather",
+        "html": html_content,
+        "text": strip_tags(html_content),
+    })
@@ -1,3 +1,45 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from catalog.models import Product
+from orders.models import Order, OrderItem
+
+
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='ada@example.com', is_active=True)
+        cls.products = Product.objects.bulk_create([
+            Product(title=f'Shoe {i}', slug=f'shoe-{i}', price_ngn=10_000 + i) for i in range(3)
+        ])
+
+    def add_orders(self, count):
+        orders = Order.objects.bulk_create([
+            Order(user=self.user, full_name='Ada Obi', email=self.user.email, phone='08000000000',
+                  address='1 Marina', city='Lagos')
+            for _ in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, size=42, quantity=2, price=product.price_ngn)
+            for order in orders for product in self.products
+        ])
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.client.force_login(self.user)
+        url = reverse('accounts:dashboard')
+        self.client.get(url)  # warm the per-process site settings
+        for total in (1, 50, 500):
+            self.add_orders(total - Order.objects.count())
+            for page in ('1', 'last'):
+                with self.subTest(orders=total, page=page):
+                    # Session, user, order count, the page of orders, their items and products.
+                    with self.assertNumQueries(5):
+                        response = self.client.get(url, {'page': page})
+                    self.assertEqual(response.status_code, 200)
+
+    def test_order_totals_come_from_the_lines(self):
+        self.add_orders(1)
+        self.client.force_login(self.user)
+        order = self.client.get(reverse('accounts:dashboard')).context['orders'][0]
+        self.assertEqual(order.get_total(), sum(2 * product.price_ngn for product in self.products))
@@ -1,23 +1,21 @@
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.db import transaction
 from django.core.mail import EmailMultiAlternatives, BadHeaderError
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.conf import settings
 from django.contrib.auth import login, logout
 from django.utils import timezone
 from .models import User
+from .tasks import send_signup_verification
 from .utils import redirect_authenticated_user
 from orders.models import Order
 import uuid
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from settings.models import SiteSettings
-import resend
+from settings.cache import get_site_settings
 
-# Initialize the Resend client
-resend.api_key = settings.RESEND_API_KEY
+ORDERS_PER_PAGE = 10
 
 def logout_view(request):
     logout(request)
@@ -34,39 +32,20 @@ def signup_view(request):
             messages.error(request, "This email is already registered.")
             return redirect('accounts:register')
 
-        # create inactive user with token
-        user = User.objects.create(
-            email=email,
-            is_active=False,
-            signup_token=str(uuid.uuid4()),
-            created_at=timezone.now()
-        )
+        with transaction.atomic():
+            # create inactive user with token
+            user = User.objects.create(
+                email=email,
+                is_active=False,
+                signup_token=str(uuid.uuid4()),
+                created_at=timezone.now()
+            )
 
-        # generate absolute verification link
-        signup_link = request.build_absolute_uri(f"/account/verify/{user.signup_token}/")
+            # generate absolute verification link
+            signup_link = request.build_absolute_uri(f"/account/verify/{user.signup_token}/")
 
-        # Render HTML email
-        html_content = render_to_string("emails/signup_verification.html", {
-            "user": user,
-            "signup_link": signup_link,
-        })
-        text_content = strip_tags(html_content)
-
-        subject = "Verify your email - Welcome to Rare Leather"
-
-        try:
-            # Send email via Resend
-            resend.Emails.send({
-                "from": "noreply@rareleather.com.ng",
-                "to": [email],
-                "subject": subject,
-                "html": html_content,
-                "text": text_content
-            })
-
-            messages.success(request, f"A verification link has been sent to {email}. Check your inbox.")
-        except Exception as e:
-            messages.error(request, f"Error sending email: {e}")
+            send_signup_verification.enqueue(user_id=user.id, signup_link=signup_link)
+        messages.success(request, f"A verification link has been sent to {email}. Check your inbox.")
 
         return redirect('accounts:register')
 
@@ -124,9 +103,16 @@ def set_password_view(request):
 
 @login_required
 def dashboard_view(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-
-    site_settings = SiteSettings.objects.first()
+    orders = (
+        Order.objects.filter(user=request.user)
+        .with_totals()
+        .with_items()
+        .order_by('-created_at', '-id')
+    )
+    # Constant query count per page: count, orders, items with their products.
+    page = Paginator(orders, ORDERS_PER_PAGE).get_page(request.GET.get('page'))
+
+    site_settings = get_site_settings()
     delivery_fee = site_settings.delivery_fee if site_settings else 3500
 
-    return render(request, 'accounts/dashboard.html', {'orders': orders, 'delivery_fee': delivery_fee,})
+    return render(request, 'accounts/dashboard.html', {'orders': page, 'delivery_fee': delivery_fee,})
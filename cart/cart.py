@@ -1,44 +1,46 @@
 from decimal import Decimal
 from catalog.models import Product
-from settings.models import SiteSettings  # Admin-editable delivery fee model
+from settings.cache import get_site_settings  # Admin-editable delivery fee model
+from .storage import get_cart_storage, line_key
+
+
+def _current_price(product, size):
+    """What a line costs today, in whole Naira."""
+    try:
+        return product.get_price_for_size(int(size))
+    except (TypeError, ValueError):
+        return product.price_ngn
+
 
 class Cart:
     def __init__(self, request):
-        self.session = request.session
-        cart = self.session.get('cart')
-        if not cart:
-            cart = self.session['cart'] = {}
-        self.cart = cart
-
-        # Load delivery fee from session or admin settings
-        settings = SiteSettings.objects.first()
+        # Session, cookie, cache or database, depending on settings and on
+        # whether the user is signed in. Nothing is written until the cart
+        # actually changes (see save()).
+        self.storage = get_cart_storage(request)
+        self.cart = self.storage.load()
+
+        # Lines are stored unpriced; the fee, like the prices, is today's.
+        settings = get_site_settings()
         # Use admin value if exists, else default 3500
-        self.delivery_fee = Decimal(self.session.get('delivery_fee', settings.delivery_fee if settings else 3500))
-        # Save back as string to session (JSON-serializable)
-        self.session['delivery_fee'] = str(self.delivery_fee)
+        self.delivery_fee = Decimal(settings.delivery_fee if settings else 3500)
+
+        # Products looked up during this request, shared by every Cart built
+        # in it, so templates, totals and checkout cost one query between them.
+        self._products = request.__dict__.setdefault('_cart_products', {})
+        self._items = None
 
     def _generate_key(self, product, size):
         """Create unique key per product + size combination."""
-        return f"{product.id}_{size}" if size else str(product.id)
+        return line_key(product.id, size)
 
-    def add(self, product, quantity=1, size=None, override_quantity=False, price=None):
+    def add(self, product, quantity=1, size=None, override_quantity=False):
         key = self._generate_key(product, size)
 
-        # Convert price to Decimal; fallback to product price
-        final_price = Decimal(price) if price is not None else Decimal(product.price_ngn)
-
-        # Add extra fee for large sizes if applicable
-        if size and hasattr(product, "large_size_threshold") and hasattr(product, "large_size_extra_fee"):
-            try:
-                if int(size) > int(product.large_size_threshold):
-                    final_price += Decimal(product.large_size_extra_fee)
-            except (ValueError, TypeError):
-                pass
-
+        before = self.cart.get(key, {}).copy()
         if key not in self.cart:
             self.cart[key] = {
                 'quantity': 0,
-                'price_ngn': str(final_price),  # store as string to avoid JSON serialization issues
                 'size': size,
                 'product_id': product.id
             }
@@ -48,54 +50,70 @@ class Cart:
         else:
             self.cart[key]['quantity'] += quantity
 
-        # Always ensure price and size are up-to-date
-        self.cart[key]['price_ngn'] = str(final_price)
-        self.cart[key]['size'] = size
-
-        self.save()
+        if self.cart[key] != before:
+            self.save()
 
     def save(self):
-        self.session.modified = True
+        """Write the lines back to their storage."""
+        self._items = None
+        self.storage.save(self.cart)
 
     def remove(self, product, size=None):
         key = self._generate_key(product, size)
         if size:
-            if key in self.cart:
-                del self.cart[key]
+            keys_to_remove = [key] if key in self.cart else []
         else:
             keys_to_remove = [k for k in self.cart.keys() if k.startswith(f"{product.id}_") or k == str(product.id)]
-            for k in keys_to_remove:
-                del self.cart[k]
-        self.save()
+        for k in keys_to_remove:
+            del self.cart[k]
+        if keys_to_remove:
+            self.save()
+
+    def _resolve(self):
+        """Cart lines joined to their products, computed once per cart state."""
+        if self._items is None:
+            missing = {item['product_id'] for item in self.cart.values()} - self._products.keys()
+            if missing:
+                self._products.update(Product.objects.in_bulk(missing))
+
+            self._items = []
+            for key, item in self.cart.items():
+                product = self._products.get(item['product_id'])
+                if product:
+                    # Make a copy so we don't modify the stored cart
+                    item_copy = item.copy()
+                    item_copy['key'] = key
+                    item_copy['product'] = product
+                    item_copy['price_ngn'] = _current_price(product, item['size'])
+                    item_copy['total_price'] = item_copy['price_ngn'] * item['quantity']
+                    self._items.append(item_copy)
+        return self._items
 
     def __iter__(self):
-        product_ids = [item['product_id'] for item in self.cart.values()]
-        products = Product.objects.filter(id__in=product_ids)
-        product_map = {str(p.id): p for p in products}
-
-        for key, item in self.cart.items():
-            product = product_map.get(str(item['product_id']))
-            if product:
-                # Make a copy so we don't modify the session
-                item_copy = item.copy()
-                item_copy['product'] = product
-                item_copy['total_price'] = Decimal(item_copy['price_ngn']) * item_copy['quantity']
-                yield item_copy
+        return iter(self._resolve())
+
+    def get_item(self, product, size=None):
+        """The resolved line for one product + size, or None."""
+        key = self._generate_key(product, size)
+        return next((item for item in self._resolve() if item['key'] == key), None)
 
     def __len__(self):
-        return sum(item['quantity'] for item in self.cart.values())
+        return sum(item['quantity'] for item in self._resolve())
+
+    def get_subtotal(self):
+        """Total of the lines, in whole Naira."""
+        return sum(item['total_price'] for item in self._resolve())
 
     def get_total_price(self):
         """Total price including delivery fee."""
-        total = sum(Decimal(item['price_ngn']) * item['quantity'] for item in self.cart.values())
-        return total + self.delivery_fee
+        return self.delivery_fee + self.get_subtotal()
 
     def get_delivery_fee(self):
         """Return current delivery fee."""
         return self.delivery_fee
 
     def clear(self):
-        self.session['cart'] = {}
-        # Keep delivery fee in session
-        self.session['delivery_fee'] = str(self.delivery_fee)
+        if not self.cart:
+            return
+        self.cart = {}
         self.save()
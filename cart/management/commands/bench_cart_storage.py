@@ -0,0 +1,100 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from cart.storage import (
+    CacheCartStorage, DatabaseCartStorage, SessionCartStorage, SignedCookieCartStorage, line_key,
+)
+
+BACKENDS = (SessionCartStorage, SignedCookieCartStorage, CacheCartStorage, DatabaseCartStorage)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Browser:
+    """Carries cookies and the session from one fake request to the next."""
+
+    def __init__(self, user):
+        self.factory = RequestFactory()
+        self.user = user
+        self.cookies = {}
+        self.session = SessionStore()
+
+    def request(self):
+        request = self.factory.get('/cart/')
+        request.COOKIES.update(self.cookies)
+        request.session = self.session
+        request.user = self.user
+        return request
+
+    def finish(self, storage):
+        response = HttpResponse()
+        storage.process_response(response)
+        for name, morsel in response.cookies.items():
+            if morsel['max-age'] == 0:
+                self.cookies.pop(name, None)
+            else:
+                self.cookies[name] = morsel.value
+        if self.session.modified:
+            self.session.save()
+            self.session.modified = False
+
+
+def sample_lines(count):
+    lines = {}
+    for i in range(count):
+        product_id, size = 1000 + i, 38 + i % 8
+        lines[line_key(product_id, size)] = {'quantity': 1 + i % 3, 'size': size, 'product_id': product_id}
+    return lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a request's cart load, plus a save when the cart changed, for each storage backend "
+        "(database work is rolled back). What every backend must do is covered by cart.tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=5, help="Cart lines in the benchmark cart.")
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(email='cart-bench@example.com', is_active=True)
+                for backend in BACKENDS:
+                    owner = user if backend is DatabaseCartStorage else AnonymousUser()
+                    read, write, size = self._time(backend, owner, options)
+                    self.stdout.write(
+                        f"{backend.__name__:<26} load {read:7.3f} ms   load+save {write:7.3f} ms   "
+                        f"{size:>5} cookie bytes"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _time(self, backend, user, options):
+        browser = Browser(user)
+        lines = sample_lines(options['lines'])
+        reads, writes = [], []
+        for i in range(options['repeat']):
+            # Most requests only read the cart; every other one here changes a quantity.
+            start = time.perf_counter()
+            storage = backend(browser.request())
+            loaded = storage.load()
+            if i % 2:
+                key = next(iter(lines))
+                storage.save({**lines, **loaded, key: {**lines[key], 'quantity': 1 + i % 5}})
+            browser.finish(storage)
+            (writes if i % 2 else reads).append((time.perf_counter() - start) * 1000)
+        cookie_bytes = sum(len(value) for value in browser.cookies.values())
+        return statistics.median(reads), statistics.median(writes), cookie_bytes
@@ -0,0 +1,11 @@
+class CartStorageMiddleware:
+    """Lets cart storage backends (see cart.storage) set or delete their cookies."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        for storage in getattr(request, '_cart_storages', ()):
+            storage.process_response(response)
+        return response
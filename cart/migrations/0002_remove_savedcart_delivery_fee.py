@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='savedcart',
+            name='delivery_fee',
+        ),
+    ]
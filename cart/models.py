@@ -1,3 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
 from django.db import models
+from django.dispatch import receiver
 
-# Create your models here.
+from .storage import merge_anonymous_cart
+
+
+class SavedCart(models.Model):
+    """A signed-in user's cart, kept by cart.storage.DatabaseCartStorage."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_cart')
+    lines = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Cart for {self.user}"
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    # Requests built outside the middleware stack (e.g. Client.force_login) have no user or cart.
+    if request is not None and hasattr(request, 'user'):
+        merge_anonymous_cart(request)
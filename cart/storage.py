@@ -0,0 +1,233 @@
+"""
+Where a Cart keeps its lines.
+
+A storage backend loads and saves the cart as a dict of lines keyed by
+line_key(). A line is only what the customer chose: product_id, size and
+quantity. Prices and the delivery fee are never stored, since a cart can
+sit for weeks; Cart looks them up afresh whenever it loads one. Cart picks
+one per request through get_cart_storage():
+
+    CART_ANONYMOUS_STORAGE  for visitors (default: signed cookie, no server I/O)
+    CART_USER_STORAGE       for signed-in users (default: database, follows them across devices)
+
+Backends that need to set cookies do it from CartStorageMiddleware.
+When a visitor signs in, their anonymous cart is merged into the user's
+cart (see merge_anonymous_cart).
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+CART_COOKIE_AGE = 60 * 60 * 24 * 30
+
+
+def line_key(product_id, size):
+    """Unique key per product + size combination."""
+    return f"{product_id}_{size}" if size else str(product_id)
+
+
+def stored_lines(lines):
+    """The lines as every backend keeps them; anything else (e.g. prices in old carts) is dropped."""
+    return {
+        key: {'quantity': line['quantity'], 'size': line['size'], 'product_id': line['product_id']}
+        for key, line in lines.items()
+    }
+
+
+class CartStorage:
+    """Base class: subclasses implement read(), write() and wipe()."""
+
+    def __init__(self, request):
+        self.request = request
+        self._loaded = None
+
+    def load(self):
+        """The stored lines. Read once per request."""
+        if self._loaded is None:
+            self._loaded = stored_lines(self.read())
+        return self._loaded
+
+    def save(self, lines):
+        self._loaded = stored_lines(lines)
+        self.write(self._loaded)
+
+    def delete(self):
+        self._loaded = {}
+        self.wipe()
+
+    def read(self):
+        raise NotImplementedError
+
+    def write(self, lines):
+        raise NotImplementedError
+
+    def wipe(self):
+        raise NotImplementedError
+
+    def process_response(self, response):
+        """Hook for backends that keep state in cookies."""
+
+    def _cookie_kwargs(self):
+        return {
+            'max_age': CART_COOKIE_AGE,
+            'httponly': True,
+            'samesite': 'Lax',
+            'secure': self.request.is_secure(),
+        }
+
+
+class SessionCartStorage(CartStorage):
+    """The cart inside the Django session (the original behaviour)."""
+
+    def read(self):
+        return self.request.session.get('cart') or {}
+
+    def write(self, lines):
+        self.request.session['cart'] = lines
+
+    def wipe(self):
+        self.request.session.pop('cart', None)
+
+
+class SignedCookieCartStorage(CartStorage):
+    """
+    The whole cart in a compressed, signed cookie: nothing is stored on the
+    server. Lines are packed as [product_id, size, quantity] lists to stay
+    well inside the 4 KB cookie limit.
+    """
+    cookie_name = 'cart'
+    salt = 'cart.storage'
+
+    def __init__(self, request):
+        super().__init__(request)
+        self._cookie = None
+
+    def read(self):
+        value = self.request.COOKIES.get(self.cookie_name)
+        if not value:
+            return {}
+        try:
+            data = signing.loads(value, salt=self.salt, max_age=CART_COOKIE_AGE)
+            # Cookies written before prices were dropped carry a fourth value; ignore it.
+            return {
+                line_key(product_id, size): {'quantity': int(quantity), 'size': size, 'product_id': product_id}
+                for product_id, size, quantity, *_ in data['l']
+            }
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return {}
+
+    def write(self, lines):
+        packed = [[line['product_id'], line['size'], line['quantity']] for line in lines.values()]
+        self._cookie = signing.dumps({'l': packed}, salt=self.salt, compress=True)
+
+    def wipe(self):
+        self._cookie = ''
+
+    def process_response(self, response):
+        if self._cookie is None:
+            return
+        if self._cookie:
+            response.set_cookie(self.cookie_name, self._cookie, **self._cookie_kwargs())
+        else:
+            response.delete_cookie(self.cookie_name, samesite='Lax')
+
+
+class CacheCartStorage(CartStorage):
+    """The cart in the shared cache, found through a random cart-id cookie."""
+    cookie_name = 'cart_id'
+    key_prefix = 'cart:'
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.cart_id = request.COOKIES.get(self.cookie_name)
+        self._new_id = False
+
+    def read(self):
+        if not self.cart_id:
+            return {}
+        data = cache.get(self.key_prefix + self.cart_id)
+        if not data:
+            return {}
+        return data['lines']
+
+    def write(self, lines):
+        if not self.cart_id:
+            self.cart_id = secrets.token_urlsafe(24)
+            self._new_id = True
+        cache.set(self.key_prefix + self.cart_id, {'lines': lines}, CART_COOKIE_AGE)
+
+    def wipe(self):
+        if self.cart_id:
+            cache.delete(self.key_prefix + self.cart_id)
+
+    def process_response(self, response):
+        if self._new_id:
+            response.set_cookie(self.cookie_name, self.cart_id, **self._cookie_kwargs())
+
+
+class DatabaseCartStorage(CartStorage):
+    """A persistent cart per accounts.User, so it follows them across devices."""
+
+    def read(self):
+        from .models import SavedCart
+
+        return SavedCart.objects.filter(user_id=self.request.user.pk).values_list('lines', flat=True).first() or {}
+
+    def write(self, lines):
+        from .models import SavedCart
+
+        SavedCart.objects.update_or_create(user_id=self.request.user.pk, defaults={'lines': lines})
+
+    def wipe(self):
+        from .models import SavedCart
+
+        SavedCart.objects.filter(user_id=self.request.user.pk).delete()
+
+
+def _storage_class(authenticated):
+    path = settings.CART_USER_STORAGE if authenticated else settings.CART_ANONYMOUS_STORAGE
+    return import_string(path)
+
+
+def _open(request, storage_class):
+    storage = storage_class(request)
+    # CartStorageMiddleware calls process_response() on everything opened.
+    request.__dict__.setdefault('_cart_storages', []).append(storage)
+    return storage
+
+
+def get_cart_storage(request):
+    """The cart storage for this request, shared by every Cart built during it."""
+    authenticated = request.user.is_authenticated
+    opened_for, storage = getattr(request, '_cart_storage', (None, None))
+    # Signing in or out mid-request switches to the other backend.
+    if storage is None or opened_for != authenticated:
+        storage = _open(request, _storage_class(authenticated))
+        request._cart_storage = (authenticated, storage)
+    return storage
+
+
+def merge_anonymous_cart(request):
+    """
+    Fold the visitor's anonymous cart into the user's cart on sign-in.
+    Quantities of lines already in the user's cart are added together.
+    """
+    anonymous_class, user_class = _storage_class(False), _storage_class(True)
+    if anonymous_class is user_class:
+        return
+    anonymous = _open(request, anonymous_class)
+    lines = anonymous.load()
+    if not lines:
+        return
+
+    storage = get_cart_storage(request)
+    merged = dict(storage.load())
+    for key, line in lines.items():
+        if key in merged:
+            line = {**line, 'quantity': merged[key]['quantity'] + line['quantity']}
+        merged[key] = line
+    storage.save(merged)
+    anonymous.delete()
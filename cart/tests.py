@@ -1,3 +1,317 @@
-from django.test import TestCase
+import uuid
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core import signing
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Product
+from orders.models import Order
+from settings.cache import bump_site_settings_version
+from settings.models import SiteSettings
+
+from .models import SavedCart
+from .storage import (
+    CacheCartStorage, DatabaseCartStorage, SessionCartStorage, SignedCookieCartStorage, line_key,
+    merge_anonymous_cart,
+)
+
+
+def cookie_cart(client):
+    """The lines of the visitor's signed-cookie cart, as stored."""
+    value = client.cookies[SignedCookieCartStorage.cookie_name].value
+    return signing.loads(value, salt=SignedCookieCartStorage.salt)
+
+
+def create_site_settings(test, **fields):
+    """The settings row for one test. Rolling it back sends no signal, so retire its cached copy by hand."""
+    test.addCleanup(bump_site_settings_version)
+    return SiteSettings.objects.create(**fields)
+
+
+class CartPricingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            title='Runner', price_ngn=20_000, extra_fee_threshold=44, extra_fee_amount=2_000
+        )
+
+    def setUp(self):
+        self.site = create_site_settings(self, delivery_fee=3_500)
+
+    def add(self, size=42, quantity=1):
+        return self.client.post(
+            reverse('cart:cart_add', args=[self.product.pk]), {'size': size, 'quantity': quantity},
+            HTTP_ACCEPT='application/json',
+        )
+
+    def cart_detail(self):
+        return self.client.get(reverse('cart:cart_detail')).context
+
+    def test_cookie_holds_no_prices(self):
+        self.add(size=45, quantity=2)
+        self.assertEqual(cookie_cart(self.client), {'l': [[self.product.pk, 45, 2]]})
+
+    def test_lines_and_fee_are_priced_when_loaded(self):
+        self.add(size=45)
+        Product.objects.filter(pk=self.product.pk).update(price_ngn=30_000)
+        self.site.delivery_fee = 5_000
+        self.site.save()
+
+        context = self.cart_detail()
+        self.assertEqual(context['delivery_fee'], 5_000)
+        self.assertEqual(context['total_price'], 30_000 + 2_000 + 5_000)
+
+    def test_prices_in_old_cookies_are_ignored(self):
+        value = signing.dumps({'l': [[self.product.pk, 42, 3, 1]], 'f': '0'},
+                              salt=SignedCookieCartStorage.salt, compress=True)
+        self.client.cookies[SignedCookieCartStorage.cookie_name] = value
+
+        context = self.cart_detail()
+        self.assertEqual(context['total_price'], 3 * 20_000 + 3_500)
+
+    def test_saved_cart_prices_are_ignored(self):
+        user = get_user_model().objects.create_user(email='ada@example.com', is_active=True)
+        SavedCart.objects.create(user=user, lines={
+            line_key(self.product.pk, 42): {'quantity': 2, 'size': 42, 'product_id': self.product.pk, 'price_ngn': 1},
+        })
+        self.client.force_login(user)
+
+        context = self.cart_detail()
+        self.assertEqual(context['total_price'], 2 * 20_000 + 3_500)
+
+    def test_checkout_after_sign_in_charges_current_prices(self):
+        user = get_user_model().objects.create_user(email='ada@example.com', password='pw12345!x', is_active=True)
+        self.add(quantity=2)
+        Product.objects.filter(pk=self.product.pk).update(price_ngn=25_000)
+
+        self.client.post(reverse('accounts:login'), {'username': user.email, 'password': 'pw12345!x'})
+        self.client.post(reverse('orders:checkout'), {
+            'phone': '08000000000', 'address': '1 Marina', 'city': 'Lagos', 'checkout_key': uuid.uuid4(),
+        })
+
+        order = Order.objects.get(user=user)
+        self.assertEqual(order.total_price, 2 * 25_000 + 3_500)
+        self.assertEqual(list(order.items.values_list('price', flat=True)), [25_000])
+
+
+class CartEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(title='Runner', price_ngn=20_000, min_size=40, max_size=45)
+
+    def post(self, name, data, json=True):
+        headers = {'HTTP_ACCEPT': 'application/json'} if json else {}
+        return self.client.post(reverse(f'cart:{name}', args=[self.product.pk]), data, **headers)
+
+    def lines(self):
+        return {line['size']: line['quantity'] for line in self.client.get(reverse('cart:cart_detail')).context['cart']}
+
+    def test_sizes_outside_the_range_are_rejected(self):
+        for size in ('-5', '0', '39', '46', 'big'):
+            with self.subTest(size=size):
+                self.assertEqual(self.post('cart_add', {'size': size}).status_code, 400)
+                self.assertEqual(self.post('cart_update', {'size': size, 'quantity': 2}).status_code, 400)
+        self.assertEqual(self.lines(), {})
+
+    def test_form_posts_get_a_message(self):
+        response = self.post('cart_add', {'size': '-5'}, json=False)
+        self.assertEqual(response['Location'], reverse('cart:cart_detail'))
+        self.assertContains(self.client.get(response['Location']), 'Choose a size from 40 to 45')
+
+    def test_remove_takes_one_size_or_all(self):
+        self.post('cart_add', {'size': 41})
+        self.post('cart_add', {'size': 42})
+        self.assertEqual(self.post('cart_remove', {'size': '0'}).status_code, 400)
+        self.assertEqual(self.lines(), {41: 1, 42: 1})
+        self.post('cart_remove', {'size': 41})
+        self.assertEqual(self.lines(), {42: 1})
+        self.post('cart_remove', {})
+        self.assertEqual(self.lines(), {})
+
+    def test_money_is_sent_as_decimal_strings(self):
+        create_site_settings(self, delivery_fee=3_500)
+        data = self.post('cart_add', {'size': 42, 'quantity': 2}).json()
+        self.assertEqual(
+            [data['line']['price_ngn'], data['line']['total_price'], data['subtotal'], data['delivery_fee'],
+             data['total_price']],
+            ['20000.00', '40000.00', '40000.00', '3500.00', '43500.00'],
+        )
+
+
+class SignInMergeTests(TestCase):
+    def test_sign_in_without_a_request_user_does_not_fail(self):
+        user = get_user_model().objects.create_user(email='ada@example.com', is_active=True)
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('cart:cart_detail')).status_code, 200)
+
+
+def writes_to(table, queries):
+    """INSERT/UPDATE/DELETE statements against `table` among the captured queries."""
+    return sum(
+        1 for query in queries
+        if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) and f'"{table}"' in query['sql'].split('WHERE')[0]
+    )
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class StorageWriteTests(TestCase):
+    """Each storage writes only when the cart changes; reading a cart never writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(title='Runner', price_ngn=20_000)
+        cls.user = get_user_model().objects.create_user(email='ada@example.com', password='pw12345!x', is_active=True)
+
+    def walk(self):
+        """(step, session writes, saved-cart writes) for a visit that ends in checkout."""
+        cart_url = reverse('cart:cart_detail')
+        product_id = self.product.pk
+        steps = [
+            ('view empty cart', lambda: self.client.get(cart_url)),
+            ('add', lambda: self.client.post(reverse('cart:cart_add', args=[product_id]), {'size': 42})),
+            ('view cart', lambda: self.client.get(cart_url)),
+            ('set the same quantity', lambda: self.client.post(
+                reverse('cart:cart_update', args=[product_id]), {'size': 42, 'quantity': 1})),
+            ('remove what is not there', lambda: self.client.post(reverse('cart:cart_remove', args=[product_id + 1]))),
+            ('sign in', lambda: self.client.post(
+                reverse('accounts:login'), {'username': self.user.email, 'password': 'pw12345!x'})),
+            ('view checkout', lambda: self.client.get(reverse('orders:checkout'))),
+            ('view cart signed in', lambda: self.client.get(cart_url)),
+            ('check out', lambda: self.client.post(reverse('orders:checkout'), {
+                'phone': '08000000000', 'address': '1 Marina', 'city': 'Lagos', 'checkout_key': uuid.uuid4(),
+            })),
+            ('view cart after checkout', lambda: self.client.get(cart_url)),
+        ]
+        counts = []
+        for step, request in steps:
+            with CaptureQueriesContext(connection) as ctx:
+                request()
+            counts.append((step, writes_to('django_session', ctx.captured_queries), writes_to('cart_savedcart', ctx.captured_queries)))
+        return counts
+
+    def assertWrites(self, anonymous, user, expected):
+        with self.settings(CART_ANONYMOUS_STORAGE=f'cart.storage.{anonymous}', CART_USER_STORAGE=f'cart.storage.{user}'):
+            counts = self.walk()
+        # Signing in rotates the session key, which writes the session whatever the cart does.
+        counts = [(step, None if step == 'sign in' else session, saved) for step, session, saved in counts]
+        steps = [step for step, _, _ in counts]
+        self.assertEqual(counts, [(step, *writes) for step, writes in zip(steps, expected)])
+
+    def test_signed_cookie_then_database(self):
+        self.assertWrites('SignedCookieCartStorage', 'DatabaseCartStorage', [
+            (0, 0), (0, 0), (0, 0), (0, 0), (0, 0), (None, 1), (0, 0), (0, 0), (0, 1), (0, 0),
+        ])
+
+    def test_cache_then_database(self):
+        self.assertWrites('CacheCartStorage', 'DatabaseCartStorage', [
+            (0, 0), (0, 0), (0, 0), (0, 0), (0, 0), (None, 1), (0, 0), (0, 0), (0, 1), (0, 0),
+        ])
+
+    def test_session_then_database(self):
+        self.assertWrites('SessionCartStorage', 'DatabaseCartStorage', [
+            (0, 0), (1, 0), (0, 0), (0, 0), (0, 0), (None, 1), (0, 0), (0, 0), (0, 1), (0, 0),
+        ])
+
+    def test_session_throughout(self):
+        self.assertWrites('SessionCartStorage', 'SessionCartStorage', [
+            (0, 0), (1, 0), (0, 0), (0, 0), (0, 0), (None, 0), (0, 0), (0, 0), (1, 0), (0, 0),
+        ])
+
+
+class Browser:
+    """Carries cookies and the session from one request to the next, as a browser would."""
+
+    def __init__(self, user):
+        self.user = user
+        self.cookies = {}
+        self.session = SessionStore()
+
+    def request(self):
+        request = RequestFactory().get('/cart/')
+        request.COOKIES.update(self.cookies)
+        request.session = self.session
+        request.user = self.user
+        return request
+
+    def finish(self, storage):
+        response = HttpResponse()
+        storage.process_response(response)
+        for name, morsel in response.cookies.items():
+            if morsel['max-age'] == 0:
+                self.cookies.pop(name, None)
+            else:
+                self.cookies[name] = morsel.value
+        if self.session.modified:
+            self.session.save()
+            self.session.modified = False
+
+
+def sample_lines():
+    return {
+        line_key(product_id, size): {'quantity': quantity, 'size': size, 'product_id': product_id}
+        for product_id, size, quantity in [(1, 42, 1), (1, 43, 2), (7, None, 1)]
+    }
+
+
+class StorageContractTests(TestCase):
+    """What Cart relies on from every backend."""
+    backends = (SessionCartStorage, SignedCookieCartStorage, CacheCartStorage, DatabaseCartStorage)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='ada@example.com', is_active=True)
+
+    def owner(self, backend):
+        return self.user if backend is DatabaseCartStorage else AnonymousUser()
+
+    def test_round_trip(self):
+        # Prices are never stored, whatever the caller passes in.
+        priced = {key: {**line, 'price_ngn': 20_000} for key, line in sample_lines().items()}
+        for backend in self.backends:
+            with self.subTest(backend=backend.__name__):
+                browser = Browser(self.owner(backend))
+                storage = backend(browser.request())
+                self.assertEqual(storage.load(), {})
+
+                storage.save(priced)
+                self.assertEqual(storage.load(), sample_lines(), "load() after save() in the same request")
+                browser.finish(storage)
+
+                storage = backend(browser.request())
+                self.assertEqual(storage.load(), sample_lines(), "the next request")
+                browser.finish(storage)
+
+                if backend is not DatabaseCartStorage:
+                    self.assertEqual(backend(Browser(AnonymousUser()).request()).load(), {}, "another visitor")
+
+                storage = backend(browser.request())
+                storage.delete()
+                browser.finish(storage)
+                self.assertEqual(backend(browser.request()).load(), {}, "after delete()")
+
+    @override_settings(CART_ANONYMOUS_STORAGE='cart.storage.SignedCookieCartStorage')
+    def test_sign_in_merges_the_anonymous_cart(self):
+        browser = Browser(AnonymousUser())
+        storage = SignedCookieCartStorage(browser.request())
+        storage.save(sample_lines())
+        browser.finish(storage)
+
+        saved = Browser(self.user)
+        storage = DatabaseCartStorage(saved.request())
+        storage.save({line_key(1, 42): {'quantity': 3, 'size': 42, 'product_id': 1}})
+
+        request = browser.request()
+        request.user = self.user
+        merge_anonymous_cart(request)
+
+        lines = DatabaseCartStorage(saved.request()).load()
+        self.assertEqual({key: line['quantity'] for key, line in lines.items()}, {'1_42': 4, '1_43': 2, '7': 1})
+        for opened in request._cart_storages:
+            browser.finish(opened)
+        self.assertNotIn(SignedCookieCartStorage.cookie_name, browser.cookies)
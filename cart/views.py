@@ -1,28 +1,118 @@
+from decimal import Decimal
+
+from django.contrib import messages
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST
 from catalog.models import Product
 from .cart import Cart
 
+
+def _wants_json(request):
+    """fetch()/XHR callers get JSON; plain form posts keep the redirect."""
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+
+
+def _money(amount):
+    """Naira amounts go out as two-decimal strings, like the Decimal delivery fee."""
+    return f"{Decimal(amount):.2f}"
+
+
+def _cart_response(request, cart, product=None, size=None):
+    if not _wants_json(request):
+        return redirect('cart:cart_detail')
+
+    line = cart.get_item(product, size) if product else None
+    return JsonResponse({
+        'line': line and {
+            'key': line['key'],
+            'product_id': line['product_id'],
+            'title': line['product'].title,
+            'size': line['size'],
+            'quantity': line['quantity'],
+            'price_ngn': _money(line['price_ngn']),
+            'total_price': _money(line['total_price']),
+        },
+        'count': len(cart),
+        'subtotal': _money(cart.get_subtotal()),
+        'delivery_fee': _money(cart.get_delivery_fee()),
+        'total_price': _money(cart.get_total_price()),
+    })
+
+
+def _bad_request(request, message):
+    if _wants_json(request):
+        return JsonResponse({'error': message}, status=400)
+    messages.error(request, message)
+    return redirect('cart:cart_detail')
+
+
+def _posted_int(request, name, default=None):
+    try:
+        return int(request.POST.get(name, default))
+    except (TypeError, ValueError):
+        return None
+
+
+def _posted_size(request, product, default=None):
+    """The posted size if the product comes in it, else None."""
+    size = _posted_int(request, 'size', default)
+    if size is None or not product.min_size <= size <= product.max_size:
+        return None
+    return size
+
+
 @require_POST
 def cart_add(request, product_id):
     cart = Cart(request)
     product = get_object_or_404(Product, id=product_id)
-    quantity = int(request.POST.get('quantity', 1))
-    size = int(request.POST.get('size', product.min_size))
-    price = product.price_ngn
+    quantity = _posted_int(request, 'quantity', 1)
+    size = _posted_size(request, product, product.min_size)
+    if quantity is None or quantity < 1 or size is None:
+        return _bad_request(
+            request, f"Choose a size from {product.min_size} to {product.max_size} and a quantity of at least 1."
+        )
 
-    if size > product.extra_fee_threshold:
-        price += product.extra_fee_amount
+    cart.add(product=product, quantity=quantity, size=size)
+    return _cart_response(request, cart, product, size)
+
+
+@require_POST
+def cart_update(request, product_id):
+    """Set the quantity of one size; 0 removes it."""
+    cart = Cart(request)
+    product = get_object_or_404(Product, id=product_id)
+    quantity = _posted_int(request, 'quantity')
+    # Any size already in the cart can be dropped, even if the product no longer comes in it.
+    size = _posted_int(request, 'size') if quantity == 0 else _posted_size(request, product)
+    if quantity is None or quantity < 0 or size is None or size < 1:
+        return _bad_request(
+            request, f"Send a size from {product.min_size} to {product.max_size} and a quantity of 0 or more."
+        )
+
+    if quantity == 0:
+        cart.remove(product, size=size)
+    else:
+        cart.add(product=product, quantity=quantity, size=size, override_quantity=True)
+    return _cart_response(request, cart, product, size)
 
-    cart.add(product=product, quantity=quantity, price=price, size=size)
-    return redirect('cart:cart_detail')
 
 @require_POST
 def cart_remove(request, product_id):
+    """Remove one size when `size` is posted, otherwise every size of the product."""
     cart = Cart(request)
     product = get_object_or_404(Product, id=product_id)
-    cart.remove(product)
-    return redirect('cart:cart_detail')
+    size = None
+    if 'size' in request.POST:
+        size = _posted_int(request, 'size')
+        if size is None or size < 1:
+            return _bad_request(request, "Send the size to remove, or no size to remove them all.")
+    cart.remove(product, size=size)
+    return _cart_response(request, cart, product, size)
+
 
 def cart_detail(request):
     cart = Cart(request)
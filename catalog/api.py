@@ -0,0 +1,179 @@
+"""
+Read-only JSON catalog API for the mobile app and partner marketplaces.
+
+Every product endpoint accepts ?fields=a,b,c to choose what is returned;
+the listing takes the same category/price/size/sort/q parameters as the
+HTML listing, pages by cursor and carries the facet counts for the
+filters.
+
+The export streams every available product as JSON lines straight off a
+database iterator, so memory stays flat.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from .facets import PRICE_BANDS
+from .models import Category, Product
+from .pagination import KeysetPaginator
+from .views import listing_facets, product_listing
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 1000
+
+# Model columns that can be selected directly.
+SIMPLE_FIELDS = (
+    'id', 'title', 'slug', 'description', 'price_ngn', 'min_size', 'max_size',
+    'extra_fee_threshold', 'extra_fee_amount', 'available', 'created_at', 'updated_at',
+)
+# Computed fields: extra columns they need loaded.
+COMPUTED_FIELDS = {
+    'category': ('category__slug',),
+    'url': ('slug',),
+    'cover_image': (),
+    'images': (),
+}
+PRODUCT_FIELDS = SIMPLE_FIELDS + tuple(COMPUTED_FIELDS)
+DEFAULT_FIELDS = ('id', 'title', 'slug', 'price_ngn', 'category', 'cover_image', 'url')
+
+
+class FieldSelectionError(ValueError):
+    pass
+
+
+def _selected_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise FieldSelectionError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _shape_queryset(queryset, fields, keys=('id',)):
+    """Load only the columns `fields` (and the pagination keys) need."""
+    concrete = {field.name for field in Product._meta.concrete_fields}
+    # Pagination keys are read off every row, so never defer them.
+    columns = {'id', *(key for key in keys if key in concrete)}
+    for field in fields:
+        columns.update(COMPUTED_FIELDS.get(field, (field,)))
+    if 'category' in fields:
+        queryset = queryset.select_related('category')
+    if 'cover_image' in fields:
+        queryset = queryset.with_cover_image()
+    elif 'images' in fields:
+        queryset = queryset.prefetch_related('images')
+    return queryset.only(*columns)
+
+
+def _image_url(request, product_image):
+    return request.build_absolute_uri(product_image.image.url)
+
+
+def serialize_product(request, product, fields):
+    data = {}
+    for field in fields:
+        if field == 'category':
+            data[field] = product.category.slug if product.category else None
+        elif field == 'url':
+            data[field] = request.build_absolute_uri(reverse('catalog:product_detail', args=[product.slug]))
+        elif field == 'cover_image':
+            cover = product.cover_image
+            data[field] = _image_url(request, cover) if cover else None
+        elif field == 'images':
+            images = getattr(product, 'prefetched_images', None)
+            if images is None:
+                images = product.images.all()
+            data[field] = [_image_url(request, image) for image in images]
+        else:
+            data[field] = getattr(product, field)
+    return data
+
+
+def serialize_facets(counts, categories):
+    return {
+        'categories': [
+            {'slug': category.slug, 'count': counts['categories'].get(category.id, 0)}
+            for category in categories
+        ],
+        'price_bands': [
+            {'price': band, 'min': low, 'max': high, 'count': counts['price_bands'].get(band, 0)}
+            for band, (low, high) in enumerate(PRICE_BANDS)
+        ],
+        'sizes': [{'size': size, 'count': count} for size, count in counts['sizes'].items()],
+    }
+
+
+def _bad_request(message):
+    return JsonResponse({'error': message}, status=400)
+
+
+@require_GET
+def product_list(request):
+    try:
+        fields = _selected_fields(request)
+        limit = min(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except FieldSelectionError as e:
+        return _bad_request(str(e))
+    except ValueError:
+        return _bad_request("limit must be an integer")
+    if limit < 1:
+        return _bad_request("limit must be positive")
+
+    products, keys = product_listing(request.GET)
+    paginator = KeysetPaginator(_shape_queryset(products, fields, keys), keys, limit)
+    page = paginator.get_page(request.GET.get('cursor'))
+    categories = list(Category.objects.order_by('name'))
+
+    return JsonResponse({
+        'results': [serialize_product(request, product, fields) for product in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'facets': serialize_facets(listing_facets(request.GET, categories), categories),
+    })
+
+
+@require_GET
+def product_detail(request, slug):
+    try:
+        fields = _selected_fields(request)
+    except FieldSelectionError as e:
+        return _bad_request(str(e))
+
+    product = _shape_queryset(Product.objects.filter(available=True, slug=slug), fields).first()
+    if product is None:
+        return JsonResponse({'error': "Product not found."}, status=404)
+    return JsonResponse(serialize_product(request, product, fields))
+
+
+@require_GET
+def category_list(request):
+    categories = Category.objects.order_by('name').values('id', 'name', 'slug')
+    return JsonResponse({'results': list(categories)})
+
+
+@require_GET
+def product_export(request):
+    """Every available product as JSON lines (application/x-ndjson)."""
+    try:
+        fields = _selected_fields(request)
+    except FieldSelectionError as e:
+        return _bad_request(str(e))
+
+    products = _shape_queryset(Product.objects.filter(available=True), fields).order_by('id')
+
+    def lines():
+        # chunk_size keeps a server-side cursor on PostgreSQL and, with
+        # prefetches, fetches images one chunk at a time.
+        for product in products.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield json.dumps(serialize_product(request, product, fields), cls=DjangoJSONEncoder) + '\n'
+
+    response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="catalog.jsonl"'
+    return response
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import api
+
+app_name = 'catalog_api'
+
+urlpatterns = [
+    path('products/', api.product_list, name='product_list'),
+    path('products/export.jsonl', api.product_export, name='product_export'),
+    path('products/<slug:slug>/', api.product_detail, name='product_detail'),
+    path('categories/', api.category_list, name='category_list'),
+]
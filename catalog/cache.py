@@ -0,0 +1,29 @@
+"""
+Catalog version number for fragment caching.
+
+Cached catalog fragments include the current version in their key. Any
+change to a Product, ProductImage or Category bumps the version, so every
+worker stops using the old fragments at once, with no TTL to tune.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'catalog:version'
+GRID_CACHE_TIMEOUT = 60 * 60
+
+
+def catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a cache flush never brings back an old version.
+        cache.add(VERSION_KEY, int(time.time()), None)
+        version = cache.get(VERSION_KEY, int(time.time()))
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time()), None)
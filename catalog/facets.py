@@ -0,0 +1,160 @@
+"""
+Precomputed facet counts for the product listing (category, price band, size).
+
+FacetCount holds a small cube: number of available products per
+(category, price band, size). A product contributes one row per size it
+stocks plus one ANY_SIZE row, so counts stay correct whether or not a size
+is selected. Product saves/deletes apply +1/-1 deltas to the cube, and
+rebuild_facets recomputes it from scratch after bulk writes.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .cache import catalog_version
+
+ANY_SIZE = 0
+NO_CATEGORY = 0
+CUBE_CACHE_KEY = 'catalog:facets:{version}'
+
+# (lower bound inclusive, upper bound exclusive or None), in Naira
+PRICE_BANDS = (
+    (0, 50_000),
+    (50_000, 100_000),
+    (100_000, 150_000),
+    (150_000, 250_000),
+    (250_000, None),
+)
+
+
+def price_band(price_ngn):
+    for index, (low, high) in enumerate(PRICE_BANDS):
+        if price_ngn >= low and (high is None or price_ngn < high):
+            return index
+    return 0
+
+
+def price_band_label(index):
+    low, high = PRICE_BANDS[index]
+    if high is None:
+        return f"₦{low:,}+"
+    return f"₦{low:,} – ₦{high - 1:,}"
+
+
+def parse_price_band(value):
+    try:
+        index = int(value)
+    except (TypeError, ValueError):
+        return None
+    return index if 0 <= index < len(PRICE_BANDS) else None
+
+
+def parse_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return None
+    return size if size > 0 else None
+
+
+def facet_keys(category_id, price_ngn, min_size, max_size, available=True):
+    """Cube cells one product contributes to."""
+    if not available:
+        return []
+    category = category_id or NO_CATEGORY
+    band = price_band(price_ngn)
+    sizes = [ANY_SIZE, *range(min_size, max_size + 1)]
+    return [(category, band, size) for size in sizes]
+
+
+def product_facet_keys(product):
+    return facet_keys(product.category_id, product.price_ngn, product.min_size, product.max_size, product.available)
+
+
+FACET_SOURCE_FIELDS = ('category_id', 'price_ngn', 'min_size', 'max_size', 'available')
+
+
+def apply_facet_delta(removed, added):
+    """Move a product's contribution from the `removed` cells to the `added` ones."""
+    from .models import FacetCount
+
+    delta = Counter(added)
+    delta.subtract(Counter(removed))
+    changes = {key: n for key, n in delta.items() if n}
+    if not changes:
+        return
+
+    with transaction.atomic():
+        FacetCount.objects.bulk_create(
+            [FacetCount(category_id=c, price_band=b, size=s, count=0) for c, b, s in changes],
+            ignore_conflicts=True,
+        )
+        for (category, band, size), n in changes.items():
+            FacetCount.objects.filter(category_id=category, price_band=band, size=size).update(
+                count=F('count') + n
+            )
+
+
+def build_cube(rows):
+    """Cube as {(category, band, size): count} from (category_id, price, min, max, available) rows."""
+    cube = Counter()
+    for row in rows:
+        cube.update(facet_keys(*row))
+    return cube
+
+
+def rebuild_facets():
+    from .models import FacetCount, Product
+
+    rows = Product.objects.values_list(*FACET_SOURCE_FIELDS).iterator(chunk_size=2000)
+    cube = build_cube(rows)
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            [FacetCount(category_id=c, price_band=b, size=s, count=n) for (c, b, s), n in cube.items()],
+            batch_size=1000,
+        )
+    return len(cube)
+
+
+def stored_cube():
+    """The whole cube, cached per catalog version (a few hundred rows at most)."""
+    from .models import FacetCount
+
+    key = CUBE_CACHE_KEY.format(version=catalog_version())
+    cube = cache.get(key)
+    if cube is None:
+        cube = {
+            (c, b, s): n
+            for c, b, s, n in FacetCount.objects.filter(count__gt=0).values_list(
+                'category_id', 'price_band', 'size', 'count'
+            )
+        }
+        cache.set(key, cube, 60 * 60)
+    return cube
+
+
+def facet_counts(cube, category_id=None, band=None, size=None):
+    """
+    Counts for each facet, each one filtered by the *other* selected facets,
+    so shoppers see how many products every option would give them.
+    """
+    categories, bands, sizes = Counter(), Counter(), Counter()
+    size_cell = size if size is not None else ANY_SIZE
+    for (c, b, s), n in cube.items():
+        category_ok = category_id is None or c == category_id
+        band_ok = band is None or b == band
+        if s == size_cell:
+            if band_ok:
+                categories[c] += n
+            if category_ok:
+                bands[b] += n
+        if s != ANY_SIZE and category_ok and band_ok:
+            sizes[s] += n
+    return {
+        'categories': dict(categories),
+        'price_bands': dict(bands),
+        'sizes': dict(sorted(sizes.items())),
+    }
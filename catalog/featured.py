@@ -0,0 +1,68 @@
+"""
+Rotating featured-products set for the home page.
+
+Instead of ORDER BY RANDOM() over the whole catalog, a handful of ids are
+drawn once per time bucket by probing random points of the primary-key
+range (a few indexed lookups regardless of catalog size). The draw is seeded
+by the bucket number, so every worker picks the same set, and the result is
+cached until the bucket rolls over.
+"""
+import random
+import time
+
+from django.core.cache import cache
+
+from .models import Product
+
+FEATURED_COUNT = 4
+ROTATION_SECONDS = 15 * 60
+CACHE_KEY = 'catalog:featured:{bucket}'
+
+
+def current_bucket(now=None):
+    return int((now if now is not None else time.time()) // ROTATION_SECONDS)
+
+
+def _sample_ids(bucket, count):
+    # Two single-ended lookups so both bounds come straight off the primary-key
+    # index (SQLite only optimises MIN/MAX when each is queried on its own).
+    ids = Product.objects.order_by('id').values_list('id', flat=True)
+    low, high = ids.first(), ids.last()
+    if low is None:
+        return []
+    available = Product.objects.filter(available=True)
+
+    rng = random.Random(bucket)
+    picked = []
+    for _ in range(count * 4):
+        if len(picked) == count:
+            break
+        probe = rng.randint(low, high)
+        product_id = (
+            available.filter(id__gte=probe).exclude(id__in=picked)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+        if product_id is None:
+            # Probe landed past the last free id; wrap to the start of the range.
+            product_id = available.exclude(id__in=picked).order_by('id').values_list('id', flat=True).first()
+        if product_id is None:
+            break
+        picked.append(product_id)
+    return picked
+
+
+def featured_product_ids(count=FEATURED_COUNT, now=None):
+    bucket = current_bucket(now)
+    key = CACHE_KEY.format(bucket=bucket)
+    ids = cache.get(key)
+    if ids is None:
+        ids = _sample_ids(bucket, count)
+        cache.set(key, ids, ROTATION_SECONDS)
+    return ids
+
+
+def featured_products(count=FEATURED_COUNT, now=None):
+    """Featured products (with cover images) in their drawn order."""
+    ids = featured_product_ids(count, now)
+    products = Product.objects.filter(id__in=ids, available=True).with_cover_image().in_bulk()
+    return [products[product_id] for product_id in ids if product_id in products]
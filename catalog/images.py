@@ -0,0 +1,100 @@
+"""
+Resized WebP/JPEG derivatives for product images.
+
+Derivatives are written next to the original upload, e.g.
+products/loafer.jpeg -> products/loafer_640w.webp and products/loafer_640w.jpg.
+ProductImage.derivative_widths records which widths exist so templates only
+advertise files that are actually there.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+DERIVATIVE_FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpg', 'JPEG'),
+)
+QUALITY = 80
+
+# Small pool so an admin uploading a batch of images never waits on Pillow.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-derivatives')
+
+
+def derivative_name(name, width, extension):
+    stem, _ = os.path.splitext(name)
+    return f"{stem}_{width}w.{extension}"
+
+
+def render_derivatives(name):
+    """
+    Write every derivative for the stored file `name` and return the widths made.
+
+    Touches storage only, never the database, so it is safe to run in a
+    separate process (see the generate_image_derivatives command).
+    """
+    with default_storage.open(name, 'rb') as fh:
+        with Image.open(fh) as source:
+            original = ImageOps.exif_transpose(source)
+            original.load()
+
+    widths = []
+    for width in DERIVATIVE_WIDTHS:
+        if width >= original.width:
+            break
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        for extension, image_format in DERIVATIVE_FORMATS:
+            frame = resized
+            if image_format == 'JPEG' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+            buffer = BytesIO()
+            frame.save(buffer, image_format, quality=QUALITY, optimize=True)
+
+            target = derivative_name(name, width, extension)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+        widths.append(width)
+    return widths
+
+
+def generate_derivatives(image_id, name):
+    """Render derivatives for one ProductImage and record the widths on it."""
+    from .models import ProductImage, touch_product
+
+    try:
+        widths = render_derivatives(name)
+    except Exception:
+        logger.exception("Could not generate derivatives for %s", name)
+        return
+    # Guard against the image having been replaced while we were rendering.
+    images = ProductImage.objects.filter(pk=image_id, image=name)
+    if images.update(derivative_widths=widths, updated_at=timezone.now()):
+        touch_product(images.values_list('product_id', flat=True).get())
+        bump_catalog_version()
+
+
+def _generate_in_background(image_id, name):
+    close_old_connections()
+    try:
+        generate_derivatives(image_id, name)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(product_image):
+    """Queue derivative generation once the surrounding transaction commits."""
+    image_id, name = product_image.pk, product_image.image.name
+    transaction.on_commit(lambda: _executor.submit(_generate_in_background, image_id, name))
@@ -0,0 +1,85 @@
+"""
+Per-size stock reservation.
+
+Stock is taken with one conditional UPDATE per (product, size):
+
+    UPDATE catalog_productstock SET quantity = quantity - n
+    WHERE product_id = %s AND size = %s AND quantity >= n
+
+The database checks and decrements in a single statement, so concurrent
+checkouts can never oversell, and no row is locked for longer than the
+rest of the caller's transaction. Callers keep that short: write the
+order first, reserve stock last, commit.
+
+Products with no ProductStock rows at all are not inventory-tracked yet
+and can always be sold.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import ProductStock
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_id, size, requested):
+        self.product_id = product_id
+        self.size = size
+        self.requested = requested
+        super().__init__(f"Product {product_id} size {size}: fewer than {requested} left")
+
+
+def _merge(lines):
+    """Sum (product_id, size, quantity) lines per SKU, in a fixed lock order."""
+    merged = defaultdict(int)
+    for product_id, size, quantity in lines:
+        merged[(product_id, size)] += quantity
+    # Always touching rows in the same order keeps two checkouts that share
+    # SKUs from deadlocking on each other. A line may have no size, which
+    # does not compare with a number, so sizeless lines sort last.
+    return sorted(merged.items(), key=lambda item: (item[0][0], item[0][1] is None, item[0][1] or 0))
+
+
+def _is_tracked(product_id):
+    return ProductStock.objects.filter(product_id=product_id).exists()
+
+
+def take_stock(product_id, size, quantity):
+    """Decrement one SKU if enough is left. Returns False when it is short."""
+    updated = ProductStock.objects.filter(
+        product_id=product_id, size=size, quantity__gte=quantity
+    ).update(quantity=F('quantity') - quantity)
+    return bool(updated) or not _is_tracked(product_id)
+
+
+def reserve_stock(lines):
+    """
+    Take stock for every line or for none of them.
+
+    Raises OutOfStock for the first SKU that is short; the surrounding
+    atomic block rolls back whatever was already taken.
+    """
+    with transaction.atomic():
+        for (product_id, size), quantity in _merge(lines):
+            if not take_stock(product_id, size, quantity):
+                raise OutOfStock(product_id, size, quantity)
+
+
+def reserve_available_stock(lines):
+    """Take stock for each line that can still be covered; return the (product_id, size) pairs that could not."""
+    short = []
+    with transaction.atomic():
+        for (product_id, size), quantity in _merge(lines):
+            if not take_stock(product_id, size, quantity):
+                short.append((product_id, size))
+    return short
+
+
+def release_stock(lines):
+    """Put reserved units back on the shelf."""
+    with transaction.atomic():
+        for (product_id, size), quantity in _merge(lines):
+            ProductStock.objects.filter(product_id=product_id, size=size).update(
+                quantity=F('quantity') + quantity
+            )
@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Random
+from django.test import RequestFactory
+
+from catalog.featured import CACHE_KEY, current_bucket, featured_products
+from catalog.models import Product
+from shoestore.views import home
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare home page featured-product latency: ORDER BY RANDOM() vs rotating set (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        repeat = options['repeat']
+        key = CACHE_KEY.format(bucket=current_bucket())
+
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create(
+                        [Product(title=f'Bench {i}', slug=f'bench-{i}', price_ngn=20_000, available=i % 10 != 0)
+                         for i in range(size)],
+                        batch_size=2000,
+                    )
+                    legacy = self._time(repeat, lambda: list(
+                        Product.objects.with_cover_image().order_by(Random())[:4]
+                    ))
+                    cold = self._time(repeat, lambda: (cache.delete(key), featured_products()))
+                    warm = self._time(repeat, lambda: featured_products())
+                    page = self._time(repeat, lambda: home(factory.get('/')))
+                    self.stdout.write(
+                        f"{size:>8,} products   random() {legacy:8.2f} ms   "
+                        f"rotating cold {cold:6.2f} ms   warm {warm:6.2f} ms   home view {page:6.2f} ms"
+                    )
+                    raise _Rollback
+            except _Rollback:
+                cache.delete(key)
+
+    def _time(self, repeat, fn):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
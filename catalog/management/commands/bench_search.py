@@ -0,0 +1,75 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from catalog.models import Product
+from catalog.search import rebuild_index, search_products
+
+STYLES = (
+    'oxford loafer derby brogue monk strap chelsea boot suede patent leather '
+    'tan black brown cognac handmade classic italian rubber sole lace formal casual'
+).split()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare icontains vs full-text search latency on synthetic catalogs (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = self._vocabulary(rng)
+        queries = ['chel', 'patent loafer', vocabulary[7], f'{vocabulary[11]} {vocabulary[42][:3]}']
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    self._seed(size, vocabulary)
+                    self.stdout.write(f"\n{size:,} products")
+                    for query in queries:
+                        legacy = self._time(options['repeat'], lambda: list(
+                            Product.objects.filter(Q(title__icontains=query) | Q(description__icontains=query))
+                            .order_by('-created_at')[:9]
+                        ))
+                        indexed = self._time(options['repeat'], lambda: list(
+                            search_products(Product.objects.all(), query).order_by('-search_rank')[:9]
+                        ))
+                        self.stdout.write(f"  {query!r:<22} icontains {legacy:8.2f} ms   indexed {indexed:8.2f} ms")
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _vocabulary(self, rng, size=5000):
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        return [''.join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(size)]
+
+    def _seed(self, size, vocabulary):
+        rng = random.Random(size)
+        batch = []
+        for i in range(size):
+            title = ' '.join([*rng.sample(STYLES, 2), rng.choice(vocabulary)]).title()
+            batch.append(Product(
+                title=title,
+                slug=f'bench-{i}',
+                description=' '.join(rng.choices(vocabulary, k=30)),
+                price_ngn=rng.randint(15_000, 250_000),
+            ))
+        Product.objects.bulk_create(batch, batch_size=2000)
+        rebuild_index()
+
+    def _time(self, repeat, fn):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
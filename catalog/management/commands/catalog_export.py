@@ -0,0 +1,58 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import Product
+from catalog.transfer import COLUMNS, export_line, export_row
+
+
+class Command(BaseCommand):
+    help = "Write every product to a CSV or JSON-lines file that catalog_import can read back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or - for stdout.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        products = (
+            Product.objects.select_related('category')
+            .prefetch_related('images', 'stock')
+            .order_by('id')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        started = time.perf_counter()
+        try:
+            fh = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(e)
+        try:
+            count = self._write(fh, fmt, products)
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
+        elapsed = time.perf_counter() - started
+
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {count} products in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)."
+            ))
+
+    def _write(self, fh, fmt, products):
+        count = 0
+        if fmt == 'csv':
+            writer = csv.DictWriter(fh, fieldnames=COLUMNS)
+            writer.writeheader()
+            for product in products:
+                writer.writerow(export_row(product, csv=True))
+                count += 1
+        else:
+            for product in products:
+                fh.write(export_line(product))
+                count += 1
+        return count
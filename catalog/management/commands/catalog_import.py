@@ -0,0 +1,220 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from catalog.cache import bump_catalog_version
+from catalog.facets import rebuild_facets
+from catalog.models import Category, Product, ProductImage, ProductStock
+from catalog.search import rebuild_index
+from catalog.transfer import PRODUCT_FIELDS, RowError, parse_row
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products from a CSV or JSON-lines file, matched by slug. "
+        "Streams the file and writes in batches; re-running the same file changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or .jsonl file, or - for JSON lines on stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--images', help="Directory that image paths in the file are relative to.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8, help="Parallel image uploads.")
+        parser.add_argument('--skip-derivatives', action='store_true', help="Do not render image derivatives afterwards.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        self.image_dir = options['images']
+        if self.image_dir and not os.path.isdir(self.image_dir):
+            raise CommandError(f"Image directory not found: {self.image_dir}")
+
+        self.categories = {}
+        for category in Category.objects.all():
+            self.categories[category.slug] = self.categories[category.name.lower()] = category
+        self.counts = dict.fromkeys(('created', 'updated', 'unchanged', 'failed', 'images', 'stock'), 0)
+
+        started = time.perf_counter()
+        with self._open(path) as fh, ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            self.pool = pool
+            rows = self._read(fh, fmt)
+            while batch := list(islice(rows, options['batch_size'])):
+                self._import_batch(batch)
+                if options['verbosity'] > 1:
+                    self._report(started, prefix="  ")
+        elapsed = time.perf_counter() - started
+
+        if self.counts['created'] or self.counts['updated'] or self.counts['images']:
+            # Bulk writes skip the model signals; refresh what they maintain.
+            rebuild_index()
+            rebuild_facets()
+            bump_catalog_version()
+            if self.counts['images'] and not options['skip_derivatives']:
+                call_command('generate_image_derivatives', verbosity=0)
+
+        self._report(started, elapsed=elapsed)
+
+    def _open(self, path):
+        if path == '-':
+            return os.fdopen(os.dup(0), encoding='utf-8', newline='')
+        try:
+            return open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(e)
+
+    def _read(self, fh, fmt):
+        """Yield (line number, parsed row), reporting bad rows as they stream past."""
+        if fmt == 'csv':
+            raw_rows = ((reader.line_num, raw) for reader in [csv.DictReader(fh)] for raw in reader)
+        else:
+            raw_rows = ((number, line) for number, line in enumerate(fh, 1) if line.strip())
+        for number, raw in raw_rows:
+            try:
+                if fmt != 'csv':
+                    raw = json.loads(raw)
+                    if not isinstance(raw, dict):
+                        raise RowError("expected a JSON object")
+                yield number, parse_row(raw)
+            except (RowError, json.JSONDecodeError) as e:
+                self.counts['failed'] += 1
+                self.stderr.write(f"line {number}: {e}")
+
+    def _import_batch(self, batch):
+        # Later rows for the same slug win, as they would one at a time.
+        rows = {row['slug']: (number, row) for number, row in batch}
+        existing = Product.objects.in_bulk(list(rows), field_name='slug')
+        now = timezone.now()
+
+        created, updated = [], []
+        for slug, (number, row) in list(rows.items()):
+            product = existing.get(slug)
+            if product is None:
+                if 'title' not in row or 'price_ngn' not in row:
+                    self.counts['failed'] += 1
+                    self.stderr.write(f"line {number}: new product {slug!r} needs a title and price_ngn")
+                    del rows[slug]
+                    continue
+                product = Product(slug=slug)
+                created.append(product)
+            changed = self._apply(product, row)
+            if product.pk is None:
+                continue
+            if changed:
+                product.updated_at = now
+                updated.append(product)
+            else:
+                self.counts['unchanged'] += 1
+
+        with transaction.atomic():
+            Product.objects.bulk_create(created)
+            Product.objects.bulk_update(updated, [*PRODUCT_FIELDS, 'category', 'updated_at'])
+            # bulk_create only fills in primary keys on some backends.
+            ids = dict(Product.objects.filter(slug__in=list(rows)).values_list('slug', 'id'))
+            self._upsert_stock(rows, ids)
+        self.counts['created'] += len(created)
+        self.counts['updated'] += len(updated)
+
+        self._ingest_images(rows, ids)
+
+    def _apply(self, product, row):
+        """Copy the row onto the product; True if anything changed."""
+        changed = False
+        values = {name: row[name] for name in PRODUCT_FIELDS if name in row}
+        if 'category' in row:
+            values['category'] = self._category(row['category'])
+        for name, value in values.items():
+            if getattr(product, name) != value:
+                setattr(product, name, value)
+                changed = True
+        return changed
+
+    def _category(self, value):
+        category = self.categories.get(value) or self.categories.get(value.lower())
+        if category is None:
+            category, _ = Category.objects.get_or_create(slug=slugify(value), defaults={'name': value})
+            self.categories[category.slug] = self.categories[category.name.lower()] = category
+        return category
+
+    def _upsert_stock(self, rows, ids):
+        entries = [
+            ProductStock(product_id=ids[slug], size=size, quantity=quantity)
+            for slug, (_, row) in rows.items()
+            for size, quantity in row.get('stock', {}).items()
+        ]
+        if not entries:
+            return
+        ProductStock.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['product', 'size'],
+            update_fields=['quantity'],
+        )
+        self.counts['stock'] += len(entries)
+
+    def _ingest_images(self, rows, ids):
+        wanted = {
+            ids[slug]: (slug, number, row['images'])
+            for slug, (number, row) in rows.items() if row.get('images')
+        }
+        if not wanted:
+            return
+
+        have = {}
+        for product_id, name in ProductImage.objects.filter(product_id__in=wanted).values_list('product_id', 'image'):
+            have.setdefault(product_id, set()).add(os.path.basename(name))
+
+        jobs = []
+        for product_id, (slug, number, images) in wanted.items():
+            for source in images:
+                basename = os.path.basename(source)
+                target = f"products/{slug}-{basename}"
+                # Re-runs match on file name, whether it was imported or exported.
+                if have.get(product_id, set()) & {basename, os.path.basename(target)}:
+                    continue
+                if not self.image_dir:
+                    raise CommandError(f"line {number} lists new images; pass --images DIR to say where they are.")
+                jobs.append((product_id, number, os.path.join(self.image_dir, source), target))
+
+        new_images = []
+        uploads = self.pool.map(lambda job: self._upload(*job[2:]), jobs)
+        for (product_id, number, source, _), result in zip(jobs, uploads):
+            if isinstance(result, Exception):
+                self.counts['failed'] += 1
+                self.stderr.write(f"line {number}: {source}: {result}")
+            else:
+                new_images.append(ProductImage(product_id=product_id, image=result))
+        ProductImage.objects.bulk_create(new_images)
+        self.counts['images'] += len(new_images)
+
+    def _upload(self, source, target):
+        try:
+            if default_storage.exists(target):
+                return target
+            with open(source, 'rb') as fh:
+                return default_storage.save(target, File(fh))
+        except Exception as e:
+            # Reported against the row; one bad file should not stop the import.
+            return e
+
+    def _report(self, started, elapsed=None, prefix=""):
+        elapsed = elapsed or (time.perf_counter() - started)
+        c = self.counts
+        rows = c['created'] + c['updated'] + c['unchanged']
+        message = (
+            f"{prefix}{c['created']} created, {c['updated']} updated, {c['unchanged']} unchanged, "
+            f"{c['failed']} failed; {c['images']} images, {c['stock']} stock rows "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)"
+        )
+        self.stdout.write(self.style.SUCCESS(message) if not prefix else message)
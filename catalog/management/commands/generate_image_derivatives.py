@@ -0,0 +1,57 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from catalog.cache import bump_catalog_version
+from catalog.images import render_derivatives
+from catalog.models import ProductImage, touch_product
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for product images, in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--all', action='store_true', help="Regenerate images that already have derivatives.")
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.exclude(image='')
+        if not options['all']:
+            images = images.filter(derivative_widths=[])
+        pending = list(images.values_list('pk', 'image', 'product'))
+        if not pending:
+            self.stdout.write("No images need derivatives.")
+            return
+
+        # Workers only touch storage; close DB connections so forked
+        # processes do not inherit (and later close) the parent's sockets.
+        connections.close_all()
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(render_derivatives, image[1]): image for image in pending}
+            touched = set()
+            for future in as_completed(futures):
+                pk, name, product_id = futures[future]
+                try:
+                    widths = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{name}: {e}")
+                    continue
+                # Skipped if the image was replaced while it was being rendered.
+                if ProductImage.objects.filter(pk=pk, image=name).update(
+                    derivative_widths=widths, updated_at=timezone.now()
+                ):
+                    touched.add(product_id)
+                done += 1
+
+        # The detail page's ETag/Last-Modified come from the product's updated_at.
+        for product_id in touched:
+            touch_product(product_id)
+        if touched:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {done} images ({failed} failed)."))
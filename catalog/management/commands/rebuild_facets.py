@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from catalog.cache import bump_catalog_version
+from catalog.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the listing facet counts (run after bulk product writes that skip signals)."
+
+    def handle(self, *args, **options):
+        cells = rebuild_facets()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt facet index: {cells} cells."))
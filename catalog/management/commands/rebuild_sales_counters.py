@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from catalog.models import Product
+from orders.models import OrderItem
+
+
+class Command(BaseCommand):
+    help = "Recompute Product.times_purchased / revenue_ngn from paid order items."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        line_total = ExpressionWrapper(
+            F('price') * F('quantity'),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+        totals = (
+            OrderItem.objects.filter(order__payment_status='paid')
+            .values('product_id')
+            .annotate(units=Sum('quantity'), revenue=Sum(line_total))
+            .order_by()
+        )
+        counters = {row['product_id']: (row['units'], row['revenue']) for row in totals}
+
+        with transaction.atomic():
+            Product.objects.update(times_purchased=0, revenue_ngn=0)
+
+            products = list(Product.objects.filter(pk__in=counters).only('id'))
+            for product in products:
+                product.times_purchased, product.revenue_ngn = counters[product.pk]
+            Product.objects.bulk_update(products, ['times_purchased', 'revenue_ngn'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales counters for {len(products)} products."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from catalog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Repopulate the product full-text index (needed after bulk writes that skip signals)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            self.stdout.write("PostgreSQL maintains the search index itself; nothing to do.")
+            return
+        rebuild_index(using)
+        self.stdout.write(self.style.SUCCESS("Product search index rebuilt."))
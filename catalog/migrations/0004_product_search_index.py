@@ -0,0 +1,41 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+from catalog.search import FTS_TABLE, product_search_vector
+
+GIN_INDEX_NAME = 'product_search_gin_idx'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"title, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            f"SELECT id, title, description FROM catalog_product"
+        )
+    elif connection.vendor == 'postgresql':
+        Product = apps.get_model('catalog', 'Product')
+        schema_editor.add_index(Product, GinIndex(product_search_vector(), name=GIN_INDEX_NAME))
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_product_sales_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
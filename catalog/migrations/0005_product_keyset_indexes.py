@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_best_selling_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_newest_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['available', '-times_purchased', '-id'], name='product_best_selling_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['available', '-price_ngn', '-id'], name='product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['available', '-created_at', '-id'], name='product_newest_idx'),
+        ),
+    ]
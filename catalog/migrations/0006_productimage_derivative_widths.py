@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='derivative_widths',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+from catalog.facets import FACET_SOURCE_FIELDS, build_cube
+
+
+def populate_facets(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    FacetCount = apps.get_model('catalog', 'FacetCount')
+    cube = build_cube(Product.objects.values_list(*FACET_SOURCE_FIELDS))
+    FacetCount.objects.bulk_create(
+        [FacetCount(category_id=c, price_band=b, size=s, count=n) for (c, b, s), n in cube.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.PositiveBigIntegerField(help_text='Category id, 0 for uncategorised')),
+                ('price_band', models.PositiveSmallIntegerField(help_text='Index into catalog.facets.PRICE_BANDS')),
+                ('size', models.PositiveSmallIntegerField(help_text='Shoe size, 0 for any size')),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category_id', 'price_band', 'size'), name='facet_count_cell_unique')],
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
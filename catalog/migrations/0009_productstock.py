@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_facetcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.PositiveSmallIntegerField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='catalog.product')),
+            ],
+            options={
+                'ordering': ['product', 'size'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'size'), name='product_stock_size_unique')],
+            },
+        ),
+    ]
@@ -3,8 +3,17 @@
 # Create your models here.
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
+from .cache import bump_catalog_version
+from .facets import FACET_SOURCE_FIELDS, apply_facet_delta, facet_keys, product_facet_keys, rebuild_facets
+from .images import schedule_derivatives
+from .search import index_product, unindex_product
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True, blank=True)
@@ -18,6 +27,18 @@ class Category(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_cover_image(self):
+        """
+        Prefetch images in upload order so `cover_image` costs no extra query.
+
+        Listing pages stay at a fixed query count whatever the page size.
+        """
+        return self.prefetch_related(
+            models.Prefetch('images', queryset=ProductImage.objects.order_by('id'), to_attr='prefetched_images')
+        )
+
+
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='products')
     title = models.CharField(max_length=200)
@@ -40,6 +61,14 @@ class Product(models.Model):
     
     available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also touched when the product's images change; drives ETag/Last-Modified.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized sales counters, maintained by Order.mark_paid()
+    times_purchased = models.PositiveIntegerField(default=0, editable=False)
+    revenue_ngn = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+
+    objects = ProductQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -52,14 +81,142 @@ class Product(models.Model):
             return self.price_ngn + self.extra_fee_amount
         return self.price_ngn
 
+    @cached_property
+    def cover_image(self):
+        """First uploaded image, or None. Prefetched by Product.objects.with_cover_image()."""
+        if hasattr(self, 'prefetched_images'):
+            return self.prefetched_images[0] if self.prefetched_images else None
+        return self.images.order_by('id').first()
+
     def __str__(self):
         return f"{self.title} ({self.min_size}-{self.max_size})"
 
+    class Meta:
+        indexes = [
+            # One per listing keyset (see catalog.views.product_list).
+            models.Index(fields=['available', '-times_purchased', '-id'], name='product_best_selling_idx'),
+            models.Index(fields=['available', '-price_ngn', '-id'], name='product_price_idx'),
+            models.Index(fields=['available', '-created_at', '-id'], name='product_newest_idx'),
+        ]
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/')
     alt_text = models.CharField(max_length=150, blank=True)
+    # Widths of the resized WebP/JPEG copies written by catalog.images
+    derivative_widths = models.JSONField(default=list, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        # An uncommitted file means a fresh upload: old derivatives no longer apply.
+        new_upload = bool(self.image) and not self.image._committed
+        if new_upload:
+            self.derivative_widths = []
+        super().save(*args, **kwargs)
+        if new_upload:
+            schedule_derivatives(self)
 
     def __str__(self):
         return f"Image for {self.product.title}"
+
+
+class FacetCount(models.Model):
+    """
+    One cell of the listing facet cube maintained by catalog.facets: how many
+    available products fall in this category / price band / size.
+    """
+    category_id = models.PositiveBigIntegerField(help_text="Category id, 0 for uncategorised")
+    price_band = models.PositiveSmallIntegerField(help_text="Index into catalog.facets.PRICE_BANDS")
+    size = models.PositiveSmallIntegerField(help_text="Shoe size, 0 for any size")
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"category {self.category_id} / band {self.price_band} / size {self.size}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category_id', 'price_band', 'size'], name='facet_count_cell_unique'),
+        ]
+
+
+class ProductStock(models.Model):
+    """Units on hand for one size of a product, decremented by catalog.inventory at checkout."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock')
+    size = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product.title} size {self.size}: {self.quantity}"
+
+    class Meta:
+        ordering = ['product', 'size']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'size'], name='product_stock_size_unique'),
+        ]
+
+
+def touch_product(product_id):
+    """Mark a product as modified without a full save (no signals, no slug logic)."""
+    Product.objects.filter(pk=product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the full-text index in step with the product title/description."""
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_search_index(sender, instance, **kwargs):
+    unindex_product(instance)
+
+
+def _touches_facets(update_fields):
+    return update_fields is None or bool({'category', *FACET_SOURCE_FIELDS} & set(update_fields))
+
+
+@receiver(pre_save, sender=Product)
+def remember_facet_keys(sender, instance, update_fields=None, **kwargs):
+    """Capture the cube cells the product counted in before this save."""
+    previous = None
+    if instance.pk and _touches_facets(update_fields):
+        previous = Product.objects.filter(pk=instance.pk).values_list(*FACET_SOURCE_FIELDS).first()
+    instance._facet_keys_before = facet_keys(*previous) if previous else []
+
+
+@receiver(post_save, sender=Product)
+def update_facet_counts(sender, instance, created, update_fields=None, **kwargs):
+    if created or _touches_facets(update_fields):
+        apply_facet_delta(instance._facet_keys_before, product_facet_keys(instance))
+
+
+@receiver(post_delete, sender=Product)
+def remove_facet_counts(sender, instance, **kwargs):
+    apply_facet_delta(product_facet_keys(instance), [])
+
+
+@receiver(post_delete, sender=Category)
+def rebuild_facets_on_category_delete(sender, **kwargs):
+    # Products were moved to "no category" by a bulk SET_NULL that sent no
+    # Product signals, so recount from scratch (categories are rarely deleted).
+    rebuild_facets()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product_on_image_change(sender, instance, **kwargs):
+    touch_product(instance.product_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Any catalog edit retires every cached listing fragment."""
+    bump_catalog_version()
@@ -0,0 +1,127 @@
+"""
+Keyset (cursor) pagination for product listings.
+
+Pages are addressed by an opaque token holding the sort-key values of the
+row at the page boundary, so each page is a single indexed range scan of
+`per_page + 1` rows: no OFFSET, and no COUNT(*).
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def _json_default(value):
+    # Keep full microsecond precision; DjangoJSONEncoder truncates to
+    # milliseconds, which would make boundary rows repeat or vanish.
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate `queryset` in descending order of `keys`.
+
+    The last key must be unique (normally 'id') so that ties on the leading
+    keys still give a total order and stable page boundaries.
+    """
+
+    def __init__(self, queryset, keys, per_page):
+        self.queryset = queryset
+        self.keys = tuple(keys)
+        self.per_page = per_page
+
+    def get_page(self, cursor):
+        position = self._decode(cursor)
+        before = bool(position and position['before'])
+
+        queryset = self.queryset
+        if position:
+            queryset = queryset.filter(self._seek(position['values'], before))
+        ordering = [key if before else f'-{key}' for key in self.keys]
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows)
+
+        # Walking forward we know there is a previous page only because we
+        # arrived via a cursor; walking backward, the mirror holds for next.
+        has_next = has_more if not before else True
+        has_previous = bool(position) if not before else has_more
+        return CursorPage(
+            rows,
+            next_cursor=self._encode(rows[-1], before=False) if has_next else None,
+            previous_cursor=self._encode(rows[0], before=True) if has_previous else None,
+        )
+
+    def _seek(self, values, before):
+        lookup = 'gt' if before else 'lt'
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            step = Q(**{f'{key}__{lookup}': values[i]})
+            for prior_key, prior_value in zip(self.keys[:i], values[:i]):
+                step &= Q(**{prior_key: prior_value})
+            condition |= step
+        return condition
+
+    def _encode(self, obj, before):
+        payload = {'v': [getattr(obj, key) for key in self.keys], 'b': int(before)}
+        raw = json.dumps(payload, default=_json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        """Return {'values', 'before'} for a valid token, or None to start at page one."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            values = payload['v']
+            if len(values) != len(self.keys):
+                return None
+            values = [self._to_python(key, value) for key, value in zip(self.keys, values)]
+            if None in values:
+                # Sort keys are never null, and a null would not make a seek condition.
+                return None
+            return {'values': values, 'before': bool(payload.get('b'))}
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            return None
+
+    def _to_python(self, key, value):
+        try:
+            field = self.queryset.model._meta.get_field(key)
+        except FieldDoesNotExist:
+            # Annotations such as search_rank are plain numbers.
+            return float(value)
+        return field.to_python(value)
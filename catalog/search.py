@@ -0,0 +1,116 @@
+"""
+Full-text product search.
+
+SQLite uses an FTS5 table (catalog_product_fts) kept in sync by the Product
+post_save/post_delete receivers. PostgreSQL uses a GIN expression index over
+the weighted tsvector below, which Postgres maintains by itself.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'catalog_product_fts'
+SEARCH_CONFIG = 'english'
+MAX_TOKENS = 8
+
+_token_re = re.compile(r'\w+')
+
+
+def product_search_vector():
+    """Weighted tsvector used both by the GIN index and by queries (they must match)."""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def _tokens(query):
+    return _token_re.findall(query.lower())[:MAX_TOKENS]
+
+
+def search_products(queryset, query):
+    """
+    Filter `queryset` to products matching every word of `query` (prefix match)
+    and annotate a `search_rank` where higher means more relevant.
+    """
+    tokens = _tokens(query or '')
+    if not tokens:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, tokens)
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, tokens)
+
+    # Unsupported backend: fall back to the old substring scan.
+    condition = Q()
+    for token in tokens:
+        condition &= Q(title__icontains=token) | Q(description__icontains=token)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _search_sqlite(queryset, tokens):
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    # Join the FTS table once rather than correlating a MATCH per row; bm25()
+    # is lower-is-better, so negate it to sort by -search_rank on both backends.
+    # search_rank is a real annotation so cursor pagination can filter on it.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = catalog_product.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+    ).annotate(
+        search_rank=RawSQL(f"-bm25({FTS_TABLE}, 10.0, 1.0)", (), output_field=FloatField()),
+    )
+
+
+def _search_postgres(queryset, tokens):
+    vector = product_search_vector()
+    search_query = SearchQuery(
+        ' & '.join(f'{token}:*' for token in tokens),
+        search_type='raw',
+        config=SEARCH_CONFIG,
+    )
+    return (
+        queryset.annotate(search_document=vector)
+        .filter(search_document=search_query)
+        .annotate(search_rank=SearchRank(vector, search_query))
+    )
+
+
+def index_product(product):
+    """Refresh the FTS row for one product (SQLite only)."""
+    connection = connections[product._state.db or 'default']
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)",
+            [product.pk, product.title, product.description],
+        )
+
+
+def unindex_product(product):
+    """Drop the FTS row for a deleted product (SQLite only)."""
+    connection = connections[product._state.db or 'default']
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+
+
+def rebuild_index(using='default'):
+    """Repopulate the FTS table from catalog_product (SQLite only)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            f"SELECT id, title, description FROM catalog_product"
+        )
@@ -0,0 +1,40 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from catalog.images import derivative_name
+
+register = template.Library()
+
+
+def _srcset(name, widths, extension):
+    return ', '.join(
+        f"{default_storage.url(derivative_name(name, width, extension))} {width}w"
+        for width in widths
+    )
+
+
+@register.simple_tag
+def responsive_image(product_image, sizes='100vw', alt='', **attrs):
+    """
+    Render a ProductImage as <picture> with WebP and JPEG srcsets.
+
+    Falls back to a plain <img> of the original until derivatives exist.
+    Usage: {% responsive_image product.cover_image sizes="(max-width: 900px) 50vw, 240px" alt=product.title %}
+    """
+    original = product_image.image
+    alt = alt or product_image.alt_text
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    widths = product_image.derivative_widths
+
+    if not widths:
+        return format_html('<img src="{}" alt="{}" loading="lazy"{}>', original.url, alt, extra)
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy"{}>'
+        '</picture>',
+        _srcset(original.name, widths, 'webp'), sizes,
+        original.url, _srcset(original.name, widths, 'jpg'), sizes, alt, extra,
+    )
@@ -0,0 +1,130 @@
+"""
+Row format shared by the catalog_import and catalog_export commands.
+
+One product per CSV row or JSON line, keyed by slug:
+
+    slug, title, description, category, price_ngn, min_size, max_size,
+    extra_fee_threshold, extra_fee_amount, available, images, stock
+
+`category` is a category slug or name. `images` lists image files (a JSON
+array, or `;`-separated in CSV). `stock` maps size to units on hand (a JSON
+object, or `42:5;43:3` in CSV). Exported files import back unchanged.
+"""
+import json
+
+from django.utils.text import slugify
+
+from .models import Product
+
+PRODUCT_FIELDS = (
+    'title', 'description', 'price_ngn', 'min_size', 'max_size',
+    'extra_fee_threshold', 'extra_fee_amount', 'available',
+)
+INTEGER_FIELDS = ('price_ngn', 'min_size', 'max_size', 'extra_fee_threshold', 'extra_fee_amount')
+COLUMNS = ('slug', 'title', 'description', 'category', *PRODUCT_FIELDS[2:], 'images', 'stock')
+
+SLUG_LENGTH = Product._meta.get_field('slug').max_length
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise RowError(f"available: expected true/false, got {value!r}")
+
+
+def _integer(name, value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{name}: expected a whole number, got {value!r}")
+    if number < 0:
+        raise RowError(f"{name}: must not be negative")
+    return number
+
+
+def _images(value):
+    if isinstance(value, list):
+        return [str(name).strip() for name in value if str(name).strip()]
+    return [name.strip() for name in str(value).split(';') if name.strip()]
+
+
+def _stock(value):
+    if isinstance(value, dict):
+        pairs = value.items()
+    else:
+        pairs = [item.split(':', 1) for item in str(value).split(';') if item.strip()]
+    stock = {}
+    for pair in pairs:
+        if len(pair) != 2:
+            raise RowError(f"stock: expected size:quantity pairs, got {value!r}")
+        size, quantity = pair
+        stock[_integer('stock size', size)] = _integer('stock quantity', quantity)
+    return stock
+
+
+def parse_row(raw):
+    """
+    Normalise one raw CSV/JSON row. Only the columns present (and non-empty)
+    in the row are returned, so re-importing a partial file leaves other
+    fields alone.
+    """
+    row = {}
+    for name, value in raw.items():
+        if name not in COLUMNS or value is None or value == '':
+            continue
+        if name in INTEGER_FIELDS:
+            row[name] = _integer(name, value)
+        elif name == 'available':
+            row[name] = _boolean(value)
+        elif name == 'images':
+            row[name] = _images(value)
+        elif name == 'stock':
+            row[name] = _stock(value)
+        elif name in ('slug', 'category'):
+            row[name] = str(value).strip()
+        else:
+            row[name] = str(value)
+
+    if not row.get('slug'):
+        if not row.get('title'):
+            raise RowError("each row needs a slug or a title")
+        row['slug'] = slugify(row['title'])[:SLUG_LENGTH].strip('-')
+    if not row['slug']:
+        raise RowError(f"cannot build a slug from title {row['title']!r}")
+    if len(row['slug']) > SLUG_LENGTH:
+        raise RowError(f"slug: longer than {SLUG_LENGTH} characters")
+    return row
+
+
+def export_row(product, csv=False):
+    """A product as an importable row (stringified for CSV)."""
+    images = [image.image.name for image in product.images.all()]
+    stock = {str(entry.size): entry.quantity for entry in product.stock.all()}
+    row = {
+        'slug': product.slug,
+        'category': product.category.slug if product.category else '',
+        **{name: getattr(product, name) for name in PRODUCT_FIELDS},
+        'images': images,
+        'stock': stock,
+    }
+    if csv:
+        row['images'] = ';'.join(images)
+        row['stock'] = ';'.join(f"{size}:{quantity}" for size, quantity in stock.items())
+        row['available'] = 'true' if product.available else 'false'
+    return row
+
+
+def export_line(product):
+    return json.dumps(export_row(product), ensure_ascii=False) + '\n'
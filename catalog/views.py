@@ -1,55 +1,229 @@
-from django.core.paginator import Paginator
+import hashlib
+from django.conf import settings
+from django.http import QueryDict
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.utils.functional import SimpleLazyObject
+from .cache import GRID_CACHE_TIMEOUT, catalog_version
+from .facets import (
+    FACET_SOURCE_FIELDS, PRICE_BANDS, build_cube, facet_counts, parse_price_band, parse_size,
+    price_band_label, stored_cube,
+)
 from .models import Product, Category
+from .pagination import KeysetPaginator
+from .search import search_products
 
+PRODUCTS_PER_PAGE = 9
+SORT_OPTIONS = (
+    (None, 'Newest'),
+    ('most_purchased', 'Most Purchased'),
+    ('most_expensive', 'Most Expensive'),
+)
+# The parameters the listing understands. Links in the cached grid are built
+# from these alone, as they are all the fragment's cache key varies on.
+LISTING_PARAMS = ('category', 'price', 'size', 'sort', 'q', 'cursor')
 
-def product_list(request):
-    category_slug = request.GET.get('category')
-    sort = request.GET.get('sort')
-    query = request.GET.get('q')
+
+def _listing_params(request):
+    """A mutable copy of the listing parameters in the query string, without the rest."""
+    params = QueryDict(mutable=True)
+    for key in LISTING_PARAMS:
+        if key in request.GET:
+            params[key] = request.GET[key]
+    return params
+
+
+def _cursor_query(request, cursor):
+    """Current query string with the page cursor swapped for `cursor`."""
+    if cursor is None:
+        return None
+    params = _listing_params(request)
+    params['cursor'] = cursor
+    return params.urlencode()
+
+
+def _filter_query(request, key, value, toggle=True):
+    """Query string that sets (or toggles off) `key=value`, back at the first page."""
+    params = _listing_params(request)
+    params.pop('cursor', None)
+    if value is None or (toggle and params.get(key) == str(value)):
+        params.pop(key, None)
+    else:
+        params[key] = value
+    return params.urlencode()
+
+
+def product_listing(params):
+    """
+    Available products filtered/searched per the listing query parameters,
+    plus the descending keyset to paginate them by.
+    Shared by the HTML listing and the JSON API.
+    """
+    category_slug = params.get('category')
+    sort = params.get('sort')
+    query = params.get('q')
+
+    price = parse_price_band(params.get('price'))
+    size = parse_size(params.get('size'))
 
     products = Product.objects.filter(available=True)
-    categories = Category.objects.all()
 
     # --- FILTERING ---
     if category_slug:
         products = products.filter(category__slug=category_slug)
+    if price is not None:
+        low, high = PRICE_BANDS[price]
+        products = products.filter(price_ngn__gte=low)
+        if high is not None:
+            products = products.filter(price_ngn__lt=high)
+    if size is not None:
+        products = products.filter(min_size__lte=size, max_size__gte=size)
 
     # --- SEARCH FUNCTIONALITY ---
     if query:
-        products = products.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query)
-        )
+        products = search_products(products, query)
 
     # --- SORTING OPTIONS ---
+    # Each mode is a descending keyset ending in 'id' so page boundaries are stable.
     if sort == 'most_purchased':
-        products = products.order_by('-times_purchased')
+        keys = ('times_purchased', 'id')
     elif sort == 'most_expensive':
-        products = products.order_by('-price')
+        keys = ('price_ngn', 'id')
+    elif query:
+        keys = ('search_rank', 'id')
+    else:
+        keys = ('created_at', 'id')
+
+    return products, keys
+
+
+def listing_facets(params, categories):
+    """
+    Facet counts for the listing described by `params`. Without a search
+    this is a cached read of the precomputed cube; with one, the cube is
+    built from the (index-narrowed) search hits.
+    """
+    query = params.get('q')
+    if query:
+        hits = search_products(Product.objects.filter(available=True), query)
+        cube = build_cube(hits.values_list(*FACET_SOURCE_FIELDS))
     else:
-        products = products.order_by('-created_at')
+        cube = stored_cube()
+    category_slug = params.get('category')
+    category_id = next((c.id for c in categories if c.slug == category_slug), None)
+    return facet_counts(
+        cube,
+        category_id=category_id,
+        band=parse_price_band(params.get('price')),
+        size=parse_size(params.get('size')),
+    )
+
+
+def _facet_options(request, categories):
+    counts = listing_facets(request.GET, categories)
+    selected = request.GET
+    return {
+        'categories': [
+            {
+                'label': category.name,
+                'count': counts['categories'].get(category.id, 0),
+                'query': _filter_query(request, 'category', category.slug),
+                'active': selected.get('category') == category.slug,
+            }
+            for category in categories
+        ],
+        'price_bands': [
+            {
+                'label': price_band_label(band),
+                'count': counts['price_bands'].get(band, 0),
+                'query': _filter_query(request, 'price', band),
+                'active': selected.get('price') == str(band),
+            }
+            for band in range(len(PRICE_BANDS))
+        ],
+        'sizes': [
+            {
+                'label': size,
+                'count': count,
+                'query': _filter_query(request, 'size', size),
+                'active': selected.get('size') == str(size),
+            }
+            for size, count in counts['sizes'].items()
+        ],
+        'sorts': [
+            {
+                'label': label,
+                'query': _filter_query(request, 'sort', value, toggle=False),
+                'active': selected.get('sort') == value,
+            }
+            for value, label in SORT_OPTIONS
+        ],
+    }
+
+
+def product_list(request):
+    category_slug = request.GET.get('category')
+    sort = request.GET.get('sort')
+    query = request.GET.get('q')
+
+    products, keys = product_listing(request.GET)
+    products = products.with_cover_image()
+    categories = SimpleLazyObject(lambda: list(Category.objects.all()))
 
     # --- PAGINATION ---
-    # Pagination is only active when no filter/search is applied
-    if not (category_slug or sort or query):
-        paginator = Paginator(products, 9)  # 20 products per page
-        page_number = request.GET.get('page')
-        products = paginator.get_page(page_number)
+    # Evaluated lazily: on a fragment-cache hit the template never touches
+    # the page, so no product query runs at all.
+    cursor = request.GET.get('cursor')
+    paginator = KeysetPaginator(products, keys, PRODUCTS_PER_PAGE)
+    page = SimpleLazyObject(lambda: paginator.get_page(cursor))
 
     context = {
-        'products': products,
+        'products': page,
         'categories': categories,
+        'facets': SimpleLazyObject(lambda: _facet_options(request, categories)),
+        'selected_price': request.GET.get('price'),
+        'selected_size': request.GET.get('size'),
         'selected_category': category_slug,
         'selected_sort': sort,
         'query': query,
+        'cursor': cursor,
+        'next_query': SimpleLazyObject(lambda: _cursor_query(request, page.next_cursor)),
+        'previous_query': SimpleLazyObject(lambda: _cursor_query(request, page.previous_cursor)),
+        'catalog_version': catalog_version(),
+        'grid_cache_timeout': GRID_CACHE_TIMEOUT,
     }
     return render(request, 'catalog/product_list.html', context)
 
 
+def _product_updated_at(request, slug):
+    """One cheap lookup per request, shared by the ETag and Last-Modified checks."""
+    cache = request.__dict__.setdefault('_product_updated_at', {})
+    if slug not in cache:
+        cache[slug] = Product.objects.filter(slug=slug).values_list('updated_at', flat=True).first()
+    return cache[slug]
+
+
+def _product_etag(request, slug):
+    updated_at = _product_updated_at(request, slug)
+    if updated_at is None:
+        return None
+    # The page embeds the navbar state and a CSRF token, so the validator must
+    # change whenever the viewer or their CSRF cookie does.
+    viewer = request.user.pk if request.user.is_authenticated else 'anon'
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    raw = f"{slug}:{updated_at.isoformat()}:{viewer}:{csrf_cookie}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _product_last_modified(request, slug):
+    return _product_updated_at(request, slug)
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_product_etag, last_modified_func=_product_last_modified)
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug)
+    product = get_object_or_404(Product.objects.prefetch_related('images'), slug=slug)
     size_range = range(product.min_size, product.max_size + 1)
     return render(request, 'catalog/product_detail.html', {
         'product': product,
@@ -0,0 +1,21 @@
+from django.contrib import admin, messages
+
+from .models import Job
+from .queue import retry
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'queue', 'task')
+    search_fields = ('=task',)
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected dead jobs")
+    def retry_jobs(self, request, queryset):
+        count = retry(queryset)
+        self.message_user(request, f"{count} dead jobs queued again.", messages.SUCCESS)
@@ -0,0 +1,66 @@
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from jobs.models import Job
+from jobs.queue import DEFAULT_QUEUE, claim, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (emails, chat alerts). Start as many workers as needed; "
+        "each job runs once. Stops cleanly on SIGINT/SIGTERM after finishing its current jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', help=f"Queue to serve (repeatable; default {DEFAULT_QUEUE!r}).")
+        parser.add_argument('--concurrency', type=int, default=2, help="Jobs run at the same time by this worker.")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when there is nothing to do.")
+        parser.add_argument('--lease', type=int, default=300, help="Seconds a job may run before another worker may retry it.")
+        parser.add_argument('--once', action='store_true', help="Exit when no job is due instead of waiting for more.")
+
+    def handle(self, *args, **options):
+        self.queues = options['queues'] or [DEFAULT_QUEUE]
+        self.lease = timedelta(seconds=options['lease'])
+        self.stopping = threading.Event()
+        self.counts = {Job.DONE: 0, Job.QUEUED: 0, Job.DEAD: 0}
+        self.lock = threading.Lock()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stopping.set())
+
+        self.stdout.write(f"Worker serving {', '.join(self.queues)} with {options['concurrency']} slots.")
+        threads = [
+            threading.Thread(target=self._loop, args=(options,), name=f"worker-{n}")
+            for n in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        c = self.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker stopped: {c[Job.DONE]} done, {c[Job.QUEUED]} to retry, {c[Job.DEAD]} dead."
+        ))
+
+    def _loop(self, options):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = claim(self.queues, lease=self.lease)
+                if job is None:
+                    if options['once']:
+                        return
+                    self.stopping.wait(options['poll'])
+                    continue
+                status = run(job)
+                with self.lock:
+                    self.counts[status] += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"{job.task} #{job.pk} attempt {job.attempts}: {status}")
+        finally:
+            connection.close()
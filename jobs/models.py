@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """
+    A call to a task function (see jobs.queue) waiting to run, running, or
+    finished. Created in the same transaction as the change that caused it,
+    so a job exists exactly when that change committed.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (DEAD, 'Dead'),
+    )
+
+    task = models.CharField(max_length=200, help_text="Dotted path of the task function")
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(help_text="Not picked up before this time (retries back off)")
+    locked_until = models.DateTimeField(
+        null=True, blank=True, help_text="A running job whose worker has not finished by then is run again"
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # run_worker: the next due job in a queue
+            models.Index(fields=['status', 'queue', 'run_after'], name='job_due_idx'),
+        ]
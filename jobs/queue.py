@@ -0,0 +1,134 @@
+"""
+A small database-backed job queue for work that should not hold up a
+request, such as emails and chat alerts.
+
+Mark a function with @task and call `f.enqueue(**kwargs)` (JSON-able
+arguments only). This writes a Job row in the caller's transaction, so
+a job is queued only if the caller's change commits. `manage.py
+run_worker` then runs it.
+
+Workers claim a job with a conditional UPDATE, so any number of them can
+share a queue and each job runs once. A claim is a lease: a worker that
+dies mid-job leaves it to be picked up again once the lease expires,
+unless that was its last attempt. A failed job is retried with exponential backoff. After its last attempt
+it is marked dead and stays visible in the admin, where it can be
+re-queued.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+MAX_ATTEMPTS = 5
+# Retry n waits BACKOFF_BASE * 2**(n-1), capped at BACKOFF_MAX, plus up to 10% jitter.
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+LEASE = timedelta(minutes=5)
+
+
+class NotATask(Exception):
+    pass
+
+
+def task(func=None, *, queue=DEFAULT_QUEUE, max_attempts=MAX_ATTEMPTS):
+    """Make a function runnable by the worker and give it an enqueue() method."""
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.queue = queue
+        func.max_attempts = max_attempts
+        func.enqueue = lambda **kwargs: enqueue(func, **kwargs)
+        return func
+
+    return register(func) if func else register
+
+
+def enqueue(func, delay=None, **kwargs):
+    from .models import Job
+
+    if not hasattr(func, 'task_name'):
+        raise NotATask(f"{func!r} is not decorated with @task")
+    return Job.objects.create(
+        task=func.task_name,
+        kwargs=kwargs,
+        queue=func.queue,
+        max_attempts=func.max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+
+def backoff(attempt):
+    delay = min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX)
+    return delay + delay * random.uniform(0, 0.1)
+
+
+def claim(queues, lease=LEASE, candidates=10):
+    """
+    Take the next due job in `queues` (or one whose lease has run out) and
+    mark it running. Returns the Job, or None if there is nothing to do.
+    A job whose lease ran out on its last attempt is marked dead instead:
+    whatever it does is likely what killed its worker.
+    """
+    from .models import Job
+
+    now = timezone.now()
+    due = Job.objects.filter(queue__in=queues).filter(
+        Q(status=Job.QUEUED, run_after__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+    for job in due.order_by('run_after', 'id')[:candidates]:
+        # Another worker may have taken it since the SELECT; only one UPDATE wins.
+        unchanged = Job.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts)
+        if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+            error = f"Lease expired on attempt {job.attempts}; the worker running it died or hung."
+            if unchanged.update(status=Job.DEAD, last_error=error, locked_until=None, finished_at=now):
+                logger.error("Job %s (%s) failed for good: %s", job.pk, job.task, error)
+            continue
+        taken = unchanged.update(
+            status=Job.RUNNING, attempts=job.attempts + 1, locked_until=now + lease
+        )
+        if taken:
+            job.status, job.attempts, job.locked_until = Job.RUNNING, job.attempts + 1, now + lease
+            return job
+    return None
+
+
+def run(job):
+    """Run a claimed job and record the outcome. Returns the job's new status."""
+    from .models import Job
+
+    mine = Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts)
+    try:
+        func = import_string(job.task)
+        if not hasattr(func, 'task_name'):
+            raise NotATask(f"{job.task} is not decorated with @task")
+        func(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed for good after %s attempts:\n%s", job.pk, job.task, job.attempts, error)
+            mine.update(status=Job.DEAD, last_error=error, locked_until=None, finished_at=timezone.now())
+            return Job.DEAD
+        logger.warning("Job %s (%s) failed on attempt %s, will retry:\n%s", job.pk, job.task, job.attempts, error)
+        mine.update(
+            status=Job.QUEUED, last_error=error, locked_until=None,
+            run_after=timezone.now() + backoff(job.attempts),
+        )
+        return Job.QUEUED
+
+    mine.update(status=Job.DONE, locked_until=None, finished_at=timezone.now())
+    return Job.DONE
+
+
+def retry(jobs):
+    """Put dead jobs back on the queue for a fresh set of attempts."""
+    from .models import Job
+
+    return jobs.filter(status=Job.DEAD).update(
+        status=Job.QUEUED, attempts=0, run_after=timezone.now(), locked_until=None
+    )
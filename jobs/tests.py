@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim, run, task
+
+
+@task(max_attempts=2)
+def noop():
+    pass
+
+
+class LeaseTests(TestCase):
+    def claim_after_lease(self, job):
+        """Claim the job as a second worker would once the first one's lease ran out."""
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        return claim(['default'])
+
+    def test_expired_lease_is_claimed_again(self):
+        job = noop.enqueue()
+        self.assertEqual(claim(['default']).attempts, 1)
+
+        again = self.claim_after_lease(job)
+        self.assertEqual((again.pk, again.attempts), (job.pk, 2))
+        self.assertEqual(run(again), Job.DONE)
+
+    def test_expired_lease_on_the_last_attempt_is_dead(self):
+        job = noop.enqueue()
+        claim(['default'])
+        self.claim_after_lease(job)
+
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertIsNone(self.claim_after_lease(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), (Job.DEAD, 2, None))
+        self.assertIn('Lease expired on attempt 2', job.last_error)
@@ -0,0 +1,117 @@
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import Order
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed an order table (one million rows by default, rolled back afterwards) and time the "
+        "admin order changelist: the first page, each filter, search, and a deep page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--repeat', type=int, default=3, help="Requests per page; the best time is reported.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options)
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin-bench@example.com', password=None)
+        users = User.objects.bulk_create([
+            User(email=f'admin-bench-{i}@example.com', is_active=True) for i in range(options['users'])
+        ])
+
+        now = timezone.now()
+        statuses = [choice for choice, _ in Order.ORDER_STATUS_CHOICES]
+        payment_statuses = [choice for choice, _ in Order.PAYMENT_STATUS_CHOICES]
+        orders = (
+            Order(
+                user=users[i % len(users)], full_name='Admin Bench', email=users[i % len(users)].email,
+                phone='0800', address='1 Bench Road', city='Lagos', total_price=10_000 + i % 500,
+                status=statuses[i % len(statuses)], payment_status=payment_statuses[i % len(payment_statuses)],
+                reference=f'ORD-BENCH-{i}',
+            )
+            for i in range(options['orders'])
+        )
+        while batch := list(islice(orders, options['batch_size'])):
+            Order.objects.bulk_create(batch)
+
+        # created_at is auto_now_add; spread the orders over about three years.
+        span = timedelta(days=3 * 365).total_seconds() / options['orders']
+        first_id = Order.objects.get(reference='ORD-BENCH-0').id
+        self._spread_dates(first_id, now, span)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Order._meta.db_table}")
+        self.stdout.write(f"Seeded {options['orders']:,} orders in {time.perf_counter() - started:.1f}s")
+
+    def _spread_dates(self, first_id, now, span):
+        table = connection.ops.quote_name(Order._meta.db_table)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"UPDATE {table} SET created_at = %s - (id - %s) * interval '1 second' * %s WHERE id >= %s",
+                    [now, first_id, span, first_id],
+                )
+            else:
+                # SQLite has no interval type; step back from now in whole seconds.
+                cursor.execute(
+                    f"UPDATE {table} SET created_at = datetime(%s, '-' || CAST((id - %s) * %s AS INTEGER) || ' seconds') "
+                    f"WHERE id >= %s",
+                    [now.strftime('%Y-%m-%d %H:%M:%S'), first_id, span, first_id],
+                )
+
+    def _run(self, options):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_login(self.admin)
+        url = reverse('admin:orders_order_changelist')
+        last_month = (timezone.localdate().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+        pages = [
+            ("first page", {}),
+            ("payment_status=paid", {'payment_status__exact': 'paid'}),
+            ("status=processing", {'status__exact': 'processing'}),
+            ("placed today", {'placed': 'today'}),
+            (f"placed {last_month}", {'placed': last_month}),
+            ("search reference", {'q': 'ORD-BENCH-4242'}),
+            ("search email", {'q': 'admin-bench-42@example.com'}),
+            ("page 200", {'p': '200'}),
+        ]
+        client.get(url)  # warm per-process caches
+        for label, params in pages:
+            best, queries = None, None
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(url, params)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code != 200:
+                    raise CommandError(f"{label}: HTTP {response.status_code}")
+                best = elapsed if best is None else min(best, elapsed)
+                queries = len(ctx.captured_queries)
+            self.stdout.write(f"{label:<24} {best:8.1f} ms   {queries:>2} queries")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from orders.plans import VENDORS, explain, full_scans, hot_queries, is_bounded
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN every hot order/payment/session query and fail if any of them falls back to a full table scan."
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in VENDORS:
+            raise CommandError(f"No plan check for the {vendor} backend.")
+        failures = []
+        for label, queryset in hot_queries():
+            plan = explain(queryset)
+            scans = full_scans(plan, vendor, bounded=is_bounded(queryset))
+            if scans:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {label}"))
+                for line in scans:
+                    self.stdout.write(f"           {line}")
+            else:
+                self.stdout.write(f"ok         {label}")
+                if options['verbosity'] > 1:
+                    for line in plan.splitlines():
+                        self.stdout.write(f"           {line.strip()}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries fall back to a full scan.")
+        self.stdout.write(self.style.SUCCESS("Every hot query uses an index."))
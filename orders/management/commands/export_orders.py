@@ -0,0 +1,69 @@
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.export import CHUNK_SIZE, stream_export
+from orders.models import Order
+
+
+def _day(value):
+    # An argparse type: its errors become a usage message, not a traceback.
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = "Export orders with their lines and payments to CSV or XLSX for accounting, streaming from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or - for stdout (CSV only).")
+        parser.add_argument('--format', choices=['csv', 'xlsx'], help="Defaults to the file extension.")
+        parser.add_argument('--since', type=_day, help="First day to include (YYYY-MM-DD).")
+        parser.add_argument('--until', type=_day, help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument('--payment-status', choices=[c for c, _ in Order.PAYMENT_STATUS_CHOICES])
+        parser.add_argument('--status', choices=[c for c, _ in Order.ORDER_STATUS_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('xlsx' if path.lower().endswith('.xlsx') else 'csv')
+        if fmt == 'xlsx' and path == '-':
+            raise CommandError("Write XLSX to a file, not stdout.")
+
+        orders = Order.objects.all()
+        if options['since']:
+            orders = orders.filter(created_at__gte=self._start_of(options['since']))
+        if options['until']:
+            orders = orders.filter(created_at__lt=self._start_of(options['until'] + timedelta(days=1)))
+        if options['payment_status']:
+            orders = orders.filter(payment_status=options['payment_status'])
+        if options['status']:
+            orders = orders.filter(status=options['status'])
+
+        started = time.perf_counter()
+        mode, kwargs = ('w', {'encoding': 'utf-8', 'newline': ''}) if fmt == 'csv' else ('wb', {})
+        try:
+            fh = sys.stdout if path == '-' else open(path, mode, **kwargs)
+        except OSError as e:
+            raise CommandError(e)
+        try:
+            size = 0
+            for chunk in stream_export(orders, fmt, options['chunk_size']):
+                fh.write(chunk)
+                size += len(chunk)
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
+        elapsed = time.perf_counter() - started
+
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(f"Wrote {path} ({size:,} bytes) in {elapsed:.1f}s."))
+
+    def _start_of(self, day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
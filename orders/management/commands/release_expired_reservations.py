@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Cancel unpaid orders whose stock reservation has expired and put the stock back on sale. Run from cron."
+
+    def handle(self, *args, **options):
+        expired = (
+            Order.objects.filter(reserved_until__lt=timezone.now())
+            .exclude(payment_status='paid')
+            .order_by()  # the default -created_at ordering would walk the whole table
+            .only('pk')
+        )
+        released = sum(order.cancel() for order in expired.iterator())
+        self.stdout.write(self.style.SUCCESS(f"Released stock for {released} expired orders."))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.rollups import update_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the daily sales rollups up to date with orders paid since the last run "
+        "(run from cron; payments also refresh their own day as they happen)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Recompute every day from all paid orders.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        days = update_rollups(rebuild=options['rebuild'])
+        elapsed = time.perf_counter() - started
+        span = f" ({days[0]} to {days[-1]})" if days else ""
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(days)} days{span} in {elapsed:.1f}s."))
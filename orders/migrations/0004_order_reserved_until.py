@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_alter_order_options_order_payment_status_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Stock is held for this unpaid order until then', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['reserved_until'], name='order_reserved_until_idx'),
+        ),
+    ]
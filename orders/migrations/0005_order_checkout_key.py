@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_reserved_until'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='checkout_key',
+            field=models.UUIDField(blank=True, editable=False, help_text='Idempotency key from the checkout form; repeats of it return this order', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('user', 'checkout_key'), name='order_checkout_key_unique'),
+        ),
+    ]
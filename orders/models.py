@@ -1,17 +1,33 @@
-from django.db import models
+import logging
+from collections import defaultdict
+from django.db import models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Prefetch, Sum
 from django.conf import settings
+from django.utils import timezone
+from catalog.inventory import release_stock, reserve_available_stock
 from catalog.models import Product
+from .rollups import refresh_day_of
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 
+logger = logging.getLogger(__name__)
 
-import resend
-from django.utils.html import strip_tags
-from django.conf import settings
+LINE_TOTAL = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        """Prefetch items and their products, each annotated with its line_total."""
+        items = OrderItem.objects.select_related('product').annotate(line_total=LINE_TOTAL).order_by('id')
+        return self.prefetch_related(Prefetch('items', queryset=items))
+
+    def with_totals(self):
+        """Annotate items_total: the sum of the order's lines, computed by the database."""
+        line_total = ExpressionWrapper(
+            F('items__price') * F('items__quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+        return self.annotate(items_total=Sum(line_total))
 
-resend.api_key = settings.RESEND_API_KEY
 
 class Order(models.Model):
     ORDER_STATUS_CHOICES = (
@@ -27,7 +43,8 @@ class Order(models.Model):
         ('failed', 'Failed'),
     )
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Indexed by order_user_recent_idx, which also serves the dashboard's ordering.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     full_name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=20)
@@ -38,15 +55,127 @@ class Order(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     reference = models.CharField(max_length=100, blank=True, null=True, help_text="Paystack transaction reference")
+    reserved_until = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text="Stock is held for this unpaid order until then"
+    )
+    paid_at = models.DateTimeField(null=True, blank=True, editable=False)
+    checkout_key = models.UUIDField(
+        null=True, blank=True, editable=False,
+        help_text="Idempotency key from the checkout form; repeats of it return this order"
+    )
+
+    objects = OrderQuerySet.as_manager()
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.email} ({self.payment_status})"
 
     def get_total(self):
-        return sum(item.get_subtotal() for item in self.items.all())
+        """Sum of the order's lines (excluding delivery), from with_totals() when available."""
+        if hasattr(self, 'items_total'):
+            return self.items_total or 0
+        return self.items.aggregate(total=Sum(LINE_TOTAL))['total'] or 0
+
+    def stock_lines(self):
+        return self.items.values_list('product_id', 'size', 'quantity')
+
+    def mark_paid(self):
+        """
+        Flip the order to paid/processing and bump the product sales counters.
+
+        The status change is a conditional UPDATE, so only the first caller
+        records the sale; repeated verifications of the same reference are no-ops.
+        Paying keeps the reserved stock for good. If the order had already
+        been cancelled (its reservation expired), stock is taken again and
+        any size that sold out in the meantime is logged for follow-up.
+        The sales rollup for the day is refreshed once the payment commits.
+        Returns True if this call performed the transition.
+        """
+        paid_at = timezone.now()
+        with transaction.atomic():
+            unpaid = Order.objects.filter(pk=self.pk).exclude(payment_status='paid')
+            updated = unpaid.exclude(status='cancelled').update(
+                payment_status='paid', status='processing', reserved_until=None, paid_at=paid_at
+            )
+            revived = not updated and unpaid.filter(status='cancelled').update(
+                payment_status='paid', status='processing', reserved_until=None, paid_at=paid_at
+            )
+            if not (updated or revived):
+                return False
+
+            if revived:
+                for product_id, size in reserve_available_stock(self.stock_lines()):
+                    logger.warning(
+                        "Order #%s was paid after its reservation expired; product %s size %s is oversold.",
+                        self.pk, product_id, size,
+                    )
+
+            quantities = defaultdict(int)
+            revenue = defaultdict(int)
+            for product_id, quantity, price in self.items.values_list('product_id', 'quantity', 'price'):
+                quantities[product_id] += quantity
+                revenue[product_id] += price * quantity
+
+            for product_id, quantity in quantities.items():
+                Product.objects.filter(pk=product_id).update(
+                    times_purchased=F('times_purchased') + quantity,
+                    revenue_ngn=F('revenue_ngn') + revenue[product_id],
+                )
+
+            # A failed refresh is only logged; update_sales_rollups catches up.
+            transaction.on_commit(lambda: refresh_day_of(paid_at), robust=True)
+
+        self.payment_status = 'paid'
+        self.status = 'processing'
+        self.reserved_until = None
+        self.paid_at = paid_at
+        return True
+
+    def cancel(self):
+        """
+        Cancel an unpaid order and put any stock it still holds back on sale.
+
+        Both steps are conditional UPDATEs, so this races safely with
+        mark_paid() and with itself: stock is released at most once, and
+        never for an order that got paid. Returns True if the order was cancelled.
+        """
+        with transaction.atomic():
+            unpaid = Order.objects.filter(pk=self.pk).exclude(payment_status='paid')
+            held = unpaid.filter(reserved_until__isnull=False).update(
+                status='cancelled', payment_status='failed', reserved_until=None
+            )
+            if held:
+                release_stock(self.stock_lines())
+            elif not unpaid.update(status='cancelled', payment_status='failed'):
+                return False
+
+        self.status = 'cancelled'
+        self.payment_status = 'failed'
+        self.reserved_until = None
+        return True
 
     class Meta:
         ordering = ['-created_at']
+        # Each index serves a hot path; check_query_plans verifies they are used.
+        indexes = [
+            # release_expired_reservations
+            models.Index(fields=['reserved_until'], name='order_reserved_until_idx'),
+            # verify_payment: Order by Paystack reference
+            models.Index(fields=['reference'], name='order_reference_idx'),
+            # customer dashboard: a user's orders, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_recent_idx'),
+            # admin changelist: default ordering, and each list_filter with it
+            models.Index(fields=['-created_at', '-id'], name='order_recent_idx'),
+            models.Index(fields=['payment_status', '-created_at'], name='order_payment_recent_idx'),
+            models.Index(fields=['status', '-created_at'], name='order_status_recent_idx'),
+            # admin search by email
+            models.Index(fields=['email'], name='order_email_idx'),
+            # sales rollups: a day's paid orders, and orders paid since the high-water mark
+            models.Index(fields=['payment_status', 'paid_at'], name='order_paid_at_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'checkout_key'], name='order_checkout_key_unique'),
+        ]
 
 
 class OrderItem(models.Model):
@@ -63,27 +192,55 @@ class OrderItem(models.Model):
         return self.price * self.quantity
 
 
+class SalesDay(models.Model):
+    """
+    Totals for one day of paid orders, maintained by orders.rollups.
+    Refreshing a day locks its row first, so refreshes of a day never overlap.
+    """
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.day}: {self.orders} orders"
+
+
+class DailySales(models.Model):
+    """One cell of the daily sales rollup: paid sales per day, product, size and city."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    size = models.PositiveIntegerField()
+    city = models.CharField(max_length=100)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.day} / product {self.product_id} / size {self.size} / {self.city}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product', 'size', 'city'], name='daily_sales_cell_unique'),
+        ]
+
+
+class RollupMark(models.Model):
+    """How far update_sales_rollups has read: the newest paid_at it has rolled up."""
+    name = models.CharField(max_length=50, unique=True)
+    high_water = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.high_water}"
+
+
 @receiver(post_save, sender=Order)
-def send_order_completed_email(sender, instance, **kwargs):
+def queue_order_completed_email(sender, instance, **kwargs):
     """
-    Sends an email to the user when an order is marked as completed.
+    Queues an email to the user when an order is marked as completed.
     """
     if instance.status == "completed":
-        subject = f"Your Order #{instance.id} is Completed 🎉"
-        
-        # Prepare HTML and plain-text versions
-        context = {"order": instance}
-        html_content = render_to_string("emails/order_completed.html", context)
-        text_content = strip_tags(html_content)
-
-        try:
-            resend.Emails.send({
-                "from": "noreply@rareleather.com.ng",  # your verified sender domain in Resend
-                "to": [instance.email],
-                "subject": subject,
-                "html": html_content,
-                "text": text_content
-            })
-        except Exception as e:
-            # Optional: log this error
-            print(f"Error sending order completed email: {e}")
+        from .tasks import send_order_completed_email
+
+        send_order_completed_email.enqueue(order_id=instance.id)
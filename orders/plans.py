@@ -0,0 +1,92 @@
+"""
+The lookups on the order, payment and session hot paths, and a check
+that each one is answered from an index rather than a full table scan.
+Used by the check_query_plans command and the orders tests.
+"""
+import re
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from cart.models import SavedCart
+from catalog.models import ProductStock
+from payments.models import Payment
+
+from .models import Order, OrderItem
+
+ADMIN_PAGE = 100
+DASHBOARD_PAGE = 10
+VENDORS = ('postgresql', 'sqlite')
+
+
+def hot_queries():
+    """(label, queryset) for every lookup on the order/payment/session paths."""
+    now = timezone.now()
+    return [
+        ("verify_payment: order by reference", Order.objects.filter(reference='ORD-1-abc', user_id=1)),
+        ("verify_payment: payment by reference", Payment.objects.filter(reference='ORD-1-abc')),
+        ("initialize_payment: payment by order", Payment.objects.filter(order_id=1)),
+        ("checkout: order by idempotency key", Order.objects.filter(user_id=1, checkout_key='8c1b0a6e-5d6f-4c9e-9d0b-1f2e3a4b5c6d')),
+        ("checkout: stock reservation", ProductStock.objects.filter(product_id=1, size=42, quantity__gte=1)),
+        ("dashboard: a user's orders", Order.objects.filter(user_id=1).order_by('-created_at', '-id')[:DASHBOARD_PAGE]),
+        ("dashboard: items of a page of orders", OrderItem.objects.filter(order_id__in=[1, 2, 3])),
+        ("admin: changelist", Order.objects.order_by('-created_at', '-id')[:ADMIN_PAGE]),
+        ("admin: filter payment_status", Order.objects.filter(payment_status='paid').order_by('-created_at')[:ADMIN_PAGE]),
+        ("admin: filter status", Order.objects.filter(status='processing').order_by('-created_at')[:ADMIN_PAGE]),
+        ("admin: filter created_at", Order.objects.filter(created_at__gte=now - timedelta(days=7)).order_by('-created_at')[:ADMIN_PAGE]),
+        ("admin: search reference", Order.objects.filter(reference='ORD-1-abc').order_by('-created_at', '-id')[:ADMIN_PAGE]),
+        ("admin: search email", Order.objects.filter(Q(email='A@example.com') | Q(email='a@example.com'))[:ADMIN_PAGE]),
+        ("reservations: expired", Order.objects.filter(reserved_until__lt=now).exclude(payment_status='paid').order_by()),
+        ("rollups: a day's paid orders", Order.objects.filter(payment_status='paid', paid_at__gte=now - timedelta(days=1), paid_at__lt=now)),
+        ("session: load by key", Session.objects.filter(session_key='abc', expire_date__gt=now)),
+        ("cart: saved cart by user", SavedCart.objects.filter(user_id=1)),
+    ]
+
+
+def explain(queryset):
+    """The database's plan for `queryset`."""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Small tables make a seq scan the cheapest plan; forbid it
+            # to learn whether an index path exists at all.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+def full_scans(plan, vendor, bounded=False):
+    """
+    Plan lines that read a whole table, or walk a whole index without a
+    condition on it. A walk in index order is fine when the query is
+    `bounded` (LIMIT): it stops after the first page of rows.
+    """
+    if vendor == 'postgresql':
+        lines = [line.strip() for line in plan.splitlines()]
+        scans = []
+        for i, line in enumerate(lines):
+            if 'Seq Scan' in line:
+                scans.append(line)
+            elif 'Index Scan' in line or 'Index Only Scan' in line:
+                node = []
+                for detail in lines[i + 1:]:
+                    if detail.startswith('->'):
+                        break
+                    node.append(detail)
+                if not bounded and not any(detail.startswith('Index Cond') for detail in node):
+                    scans.append(line)
+        return scans
+    if vendor == 'sqlite':
+        scans = []
+        for line in plan.splitlines():
+            scan = re.search(r'\bSCAN (\w+)( USING (COVERING )?INDEX)?', line)
+            if scan and 'CONSTANT ROW' not in line and not (bounded and scan.group(2)):
+                scans.append(line.strip())
+        return scans
+    raise ValueError(f"No plan check for the {vendor} backend.")
+
+
+def is_bounded(queryset):
+    return queryset.query.high_mark is not None
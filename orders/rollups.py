@@ -0,0 +1,115 @@
+"""
+Daily sales rollups behind the sales report.
+
+DailySales holds paid sales per (day, product, size, city) and SalesDay
+the day's totals; a day is the local date of Order.paid_at. A day is
+always recomputed whole from its paid orders, so refreshing it twice is
+harmless and the two ways rollups stay current can overlap freely:
+
+- Order.mark_paid() refreshes the order's day once the payment commits.
+- update_sales_rollups refreshes every day with orders paid since its
+  high-water mark (RollupMark), which catches anything the first missed.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Trim, TruncDate
+from django.utils import timezone
+
+ROLLUP_NAME = 'daily_sales'
+# Orders paid shortly before the mark are read again: a payment can commit
+# after a later one that the previous run already saw.
+OVERLAP = timedelta(minutes=10)
+
+
+def day_bounds(day):
+    """Aware datetimes [start, end) covering a local day."""
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+
+def refresh_day(day):
+    """Recompute the rollup rows for one day from its paid orders."""
+    from .models import LINE_TOTAL, DailySales, OrderItem, SalesDay
+
+    start, end = day_bounds(day)
+    with transaction.atomic():
+        SalesDay.objects.get_or_create(day=day)
+        SalesDay.objects.select_for_update().get(day=day)
+
+        lines = OrderItem.objects.filter(
+            order__payment_status='paid', order__paid_at__gte=start, order__paid_at__lt=end
+        )
+        cells = (
+            lines.values('product_id', 'size', city=Trim('order__city'))
+            .annotate(orders=Count('order_id', distinct=True), units=Sum('quantity'), revenue=Sum(LINE_TOTAL))
+            .order_by()
+        )
+        rows = [DailySales(day=day, **cell) for cell in cells]
+        DailySales.objects.filter(day=day).delete()
+        DailySales.objects.bulk_create(rows, batch_size=1000)
+
+        SalesDay.objects.filter(day=day).update(
+            orders=lines.values('order_id').distinct().count(),
+            units=sum(row.units for row in rows),
+            revenue=sum(row.revenue for row in rows),
+            refreshed_at=timezone.now(),
+        )
+
+
+def refresh_day_of(moment):
+    refresh_day(timezone.localdate(moment))
+
+
+def update_rollups(rebuild=False):
+    """
+    Refresh every day with orders paid since the high-water mark (all of
+    them when rebuilding) and move the mark on. Returns the days refreshed.
+    """
+    from .models import DailySales, Order, RollupMark, SalesDay
+
+    mark, _ = RollupMark.objects.get_or_create(name=ROLLUP_NAME)
+    paid = Order.objects.filter(payment_status='paid', paid_at__isnull=False)
+    if mark.high_water and not rebuild:
+        paid = paid.filter(paid_at__gt=mark.high_water - OVERLAP)
+    newest = paid.aggregate(newest=Max('paid_at'))['newest']
+
+    days = []
+    if newest is not None:
+        days = list(
+            paid.filter(paid_at__lte=newest)
+            .annotate(day=TruncDate('paid_at'))
+            .values_list('day', flat=True)
+            .distinct()
+            .order_by('day')
+        )
+    if rebuild:
+        # Days whose orders are no longer paid would otherwise keep their rows.
+        DailySales.objects.exclude(day__in=days).delete()
+        SalesDay.objects.exclude(day__in=days).delete()
+
+    for day in days:
+        refresh_day(day)
+    if newest is not None:
+        RollupMark.objects.filter(pk=mark.pk).update(high_water=newest)
+    return days
+
+
+def sales_report(start, end, top=10):
+    """Report figures for the days start..end inclusive, read from the rollups only."""
+    from .models import DailySales, SalesDay
+
+    days = SalesDay.objects.filter(day__gte=start, day__lte=end)
+    cells = DailySales.objects.filter(day__gte=start, day__lte=end)
+    return {
+        'totals': days.aggregate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')),
+        'days': days.filter(orders__gt=0).order_by('day'),
+        'products': (
+            cells.values('product_id', 'product__title')
+            .annotate(units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('-revenue')[:top]
+        ),
+        'cities': cells.values('city').annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('-revenue')[:top],
+        'sizes': cells.values('size').annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('size'),
+    }
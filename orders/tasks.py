@@ -0,0 +1,21 @@
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from jobs.queue import task
+from shoestore.mail import send_email
+
+from .models import Order
+
+
+@task
+def send_order_completed_email(order_id):
+    """Tell the customer their order is completed (Resend)."""
+    order = Order.objects.get(pk=order_id)
+    html_content = render_to_string("emails/order_completed.html", {"order": order})
+    send_email({
+        "from": "noreply@rareleather.com.ng",  # your verified sender domain in Resend
+        "to": [order.email],
+        "subject": f"Your Order #{order.id} is Completed 🎉",
+        "html": html_content,
+        "text": strip_tags(html_content),
+    })
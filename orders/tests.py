@@ -1,3 +1,297 @@
-from django.test import TestCase
+import csv
+import io
+import threading
+import uuid
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.models import Product
+from payments.models import Payment
+
+from .admin import PlacedFilter
+from .export import COLUMNS, _moment, export_rows, stream_export
+from .models import LINE_TOTAL, Order, OrderItem
+from .plans import explain, full_scans, hot_queries, is_bounded
+from .rollups import sales_report, update_rollups
+
+
+def make_order(user, product, **fields):
+    fields = {
+        'full_name': 'Ada Obi', 'email': user.email, 'phone': '08000000000',
+        'address': '1 Marina', 'city': 'Lagos', **fields,
+    }
+    order = Order.objects.create(user=user, **fields)
+    OrderItem.objects.create(order=order, product=product, size=42, quantity=2, price=product.price_ngn)
+    return order
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='ada@example.com', password='pw')
+        cls.product = Product.objects.create(title='Runner', price_ngn=25_000)
+
+    def test_paid_at_is_when_the_order_was_paid(self):
+        order = make_order(self.user, self.product)
+        payment = Payment.objects.create(user=self.user, order=order, reference='ORD-1', amount=50_000)
+        Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(days=3))
+        order.mark_paid()
+
+        row = dict(zip(COLUMNS, next(export_rows(Order.objects.all()))))
+        self.assertEqual(row['paid_at'], _moment(order.paid_at))
+
+    def test_csv_quotes_formulas(self):
+        make_order(self.user, self.product, full_name='=HYPERLINK("http://x")', city='-1+2')
+        rows = list(csv.reader(io.StringIO(''.join(stream_export(Order.objects.all(), 'csv')))))
+        self.assertEqual(rows[1][5], '\'=HYPERLINK("http://x")')
+        self.assertEqual(rows[1][9], "'-1+2")
+
+    def test_xlsx_drops_characters_xml_does_not_allow(self):
+        make_order(self.user, self.product, full_name='Ada\x0bObi', address='@SUM(A1)')
+        data = b''.join(stream_export(Order.objects.all(), 'xlsx'))
+        sheet = zipfile.ZipFile(io.BytesIO(data)).read('xl/worksheets/sheet1.xml')
+        texts = [t.text for t in ElementTree.fromstring(sheet).iter() if t.tag.endswith('}t')]
+        self.assertIn('AdaObi', texts)
+        self.assertIn("'@SUM(A1)", texts)
+
+
+    def test_command_rejects_bad_dates_with_a_usage_error(self):
+        with self.assertRaisesMessage(CommandError, "argument --since: expected a YYYY-MM-DD date, got '2026-13-01'"):
+            call_command('export_orders', '-', '--since', '2026-13-01')
+
+
+class PlacedFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='ada@example.com', password='pw')
+        cls.product = Product.objects.create(title='Runner', price_ngn=25_000)
+
+    def choices(self):
+        request = RequestFactory().get('/')
+        placed = PlacedFilter(request, {}, Order, site._registry[Order])
+        return placed, [value for value, label in placed.lookup_choices]
+
+    def test_every_month_back_to_the_first_order_can_be_chosen(self):
+        order = make_order(self.user, self.product)
+        first = timezone.now() - timedelta(days=800)
+        Order.objects.filter(pk=order.pk).update(created_at=first)
+
+        placed, values = self.choices()
+        day = timezone.localtime(first)
+        while day < timezone.now():
+            self.assertTrue(
+                any(start <= day < end for start, end in map(placed._bounds, values)),
+                f"{day:%Y-%m-%d} is not covered by {values}",
+            )
+            day += timedelta(days=14)
+
+
+CHECKOUT_FORM = {'phone': '08000000000', 'address': '1 Marina', 'city': 'Lagos'}
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='ada@example.com', is_active=True)
+        cls.product = Product.objects.create(title='Runner', price_ngn=25_000)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('cart:cart_add', args=[self.product.pk]), {'size': 42, 'quantity': 2})
+
+    def test_order_lines_and_total(self):
+        self.client.post(reverse('orders:checkout'), {**CHECKOUT_FORM, 'checkout_key': uuid.uuid4()})
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(order.total_price, 2 * 25_000 + 3_500)
+        self.assertEqual(list(order.items.values_list('product', 'size', 'quantity', 'price')),
+                         [(self.product.pk, 42, 2, 25_000)])
+
+    def test_resubmitting_the_form_returns_the_same_order(self):
+        form = {**CHECKOUT_FORM, 'checkout_key': uuid.uuid4()}
+        first = self.client.post(reverse('orders:checkout'), form)
+        again = self.client.post(reverse('orders:checkout'), form)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(again['Location'], first['Location'])
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """The same checkout form submitted from many threads at once creates one order."""
+    threads = 6
+
+    def test_duplicate_submits_make_one_order(self):
+        user = get_user_model().objects.create_user(email='ada@example.com', is_active=True)
+        product = Product.objects.create(title='Runner', price_ngn=25_000)
+        browser = Client()
+        browser.force_login(user)
+        browser.post(reverse('cart:cart_add', args=[product.pk]), {'size': 42, 'quantity': 1})
+        form = {**CHECKOUT_FORM, 'checkout_key': uuid.uuid4()}
+
+        locations, busy = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(self.threads)
+
+        def submit():
+            # One shopper, one session, many clicks.
+            client = Client()
+            client.cookies = browser.cookies
+            try:
+                start.wait()
+                response = client.post(reverse('orders:checkout'), form)
+                with lock:
+                    locations.append(response['Location'])
+            except OperationalError:
+                # SQLite turns concurrent writers away; the shopper would just retry.
+                with lock:
+                    busy.append(True)
+            finally:
+                connection.close()
+
+        clicks = [threading.Thread(target=submit) for _ in range(self.threads)]
+        for thread in clicks:
+            thread.start()
+        for thread in clicks:
+            thread.join()
+
+        self.assertEqual(len(locations) + len(busy), self.threads)
+        self.assertEqual(Order.objects.filter(user=user).count(), 1)
+        order = Order.objects.get(user=user)
+        # Every submit that got an answer was sent to that one order.
+        self.assertLessEqual(set(locations), {reverse('payments:initialize_payment', args=[order.pk])})
+        self.assertEqual(order.items.count(), 1)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        for label, queryset in hot_queries():
+            with self.subTest(label):
+                self.assertEqual(full_scans(explain(queryset), connection.vendor, bounded=is_bounded(queryset)), [])
+
+    def test_unindexed_lookups_are_caught(self):
+        for queryset in (Order.objects.filter(phone='0800'), Order.objects.order_by('-created_at', '-id')):
+            with self.subTest(str(queryset.query)):
+                self.assertNotEqual(full_scans(explain(queryset), connection.vendor, bounded=is_bounded(queryset)), [])
+
+
+class OrderAdminChangelistTests(TestCase):
+    """The changelist costs the same few queries per page however many orders there are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(email='admin@example.com')
+        cls.customers = get_user_model().objects.bulk_create([
+            get_user_model()(email=f'customer-{i}@example.com', is_active=True) for i in range(5)
+        ])
+
+    def add_orders(self, count):
+        start = Order.objects.count()
+        statuses = ('pending', 'processing', 'completed')
+        Order.objects.bulk_create([
+            Order(
+                user=self.customers[i % 5], full_name='Ada Obi', email=self.customers[i % 5].email,
+                phone='08000000000', address='1 Marina', city='Lagos', total_price=10_000,
+                status=statuses[i % 3], payment_status='paid' if i % 2 else 'pending', reference=f'ORD-{i}',
+            )
+            for i in range(start, start + count)
+        ])
+
+    def test_query_count_per_page(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:orders_order_changelist')
+        self.client.get(url)  # warm the per-process site settings
+        pages = [{}, {'payment_status__exact': 'paid'}, {'status__exact': 'processing'}, {'placed': 'today'},
+                 {'q': 'ORD-3'}, {'q': 'Customer-1@example.com'}, {'p': '2'}]
+        for count in (5, 250):
+            self.add_orders(count)
+            for params in pages:
+                with self.subTest(orders=count, params=params):
+                    # Session, user, the filtered count, the page of orders with their users,
+                    # and the oldest order for the placed filter's choices.
+                    with self.assertNumQueries(5):
+                        response = self.client.get(url, params)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_search_is_exact_on_indexed_columns(self):
+        self.add_orders(20)
+        self.client.force_login(self.admin)
+        url = reverse('admin:orders_order_changelist')
+        found = {
+            term: {order.reference for order in self.client.get(url, {'q': term}).context['cl'].result_list}
+            for term in ('ORD-3', 'ORD', 'customer-2@example.com', 'CUSTOMER-2@example.com')
+        }
+        self.assertEqual(found['ORD-3'], {'ORD-3'})
+        self.assertEqual(found['ORD'], set())
+        self.assertEqual(found['customer-2@example.com'], {'ORD-2', 'ORD-7', 'ORD-12', 'ORD-17'})
+        self.assertEqual(found['CUSTOMER-2@example.com'], found['customer-2@example.com'])
+
+
+class SalesReportTests(TestCase):
+    """The report is read from the rollups alone and agrees with the order tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser(email='admin@example.com')
+        products = Product.objects.bulk_create([
+            Product(title=f'Shoe {i}', slug=f'shoe-{i}', price_ngn=20_000 + 1_000 * i) for i in range(4)
+        ])
+        now = timezone.now()
+        cities = ('Lagos', 'Abuja', 'Kano')
+        orders = Order.objects.bulk_create([
+            Order(
+                user=cls.staff, full_name='Ada Obi', email=cls.staff.email, phone='08000000000',
+                address='1 Marina', city=cities[i % 3], status='processing',
+                payment_status='pending' if i % 7 == 0 else 'paid', paid_at=now - timedelta(days=3 * i, hours=i),
+            )
+            for i in range(40)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[(i + n) % 4], size=40 + (i + n) % 5, quantity=1 + n,
+                      price=products[(i + n) % 4].price_ngn)
+            for i, order in enumerate(orders) for n in range(2)
+        ])
+        update_rollups(rebuild=True)
+
+    def paid_lines(self, start):
+        return OrderItem.objects.filter(order__payment_status='paid', order__paid_at__date__gte=start)
+
+    def test_rollups_match_the_order_tables(self):
+        today = timezone.localdate()
+        for days in (1, 30, 90, 200):
+            start = today - timedelta(days=days - 1)
+            with self.subTest(days=days):
+                report = sales_report(start, today)
+                lines = self.paid_lines(start)
+                self.assertEqual(report['totals']['revenue'], lines.aggregate(revenue=Sum(LINE_TOTAL))['revenue'])
+                self.assertEqual(
+                    {row['city']: row['revenue'] for row in report['cities']},
+                    dict(lines.values_list('order__city').annotate(revenue=Sum(LINE_TOTAL))),
+                )
+
+    def test_report_page_does_not_read_orders(self):
+        self.client.force_login(self.staff)
+        today = timezone.localdate()
+        params = {'from': (today - timedelta(days=89)).isoformat(), 'to': today.isoformat()}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('orders:sales_report'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if '"orders_order' in q['sql']], [])
+
+    def test_out_of_range_dates_fall_back_to_the_defaults(self):
+        self.client.force_login(self.staff)
+        today = timezone.localdate()
+        for params in ({'to': '0001-01-05'}, {'from': '0001-01-01'}, {'to': '9999-12-31'}, {'from': '9999-12-31'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('orders:sales_report'), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['end'], today)
+                self.assertEqual(response.context['start'], today - timedelta(days=29))
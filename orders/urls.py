@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import checkout_view, order_confirmation_view, cancel_order_view
+from .views import checkout_view, order_confirmation_view, cancel_order_view, sales_report_view
 from payments.views import initialize_payment  # verify is handled inside payments
 
 app_name = 'orders'
@@ -9,4 +9,5 @@ urlpatterns = [
     path('confirmation/<int:order_id>/', order_confirmation_view, name='order_confirmation'),
     path('payment/initialize/<int:order_id>/', initialize_payment, name='initialize_payment'),
     path('cancel/<int:order_id>/', cancel_order_view, name='cancel_order'),
+    path('reports/sales/', sales_report_view, name='sales_report'),
 ]
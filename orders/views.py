@@ -1,26 +1,74 @@
 import uuid
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils import timezone
 
 from .models import Order, OrderItem
+from .rollups import sales_report
+from catalog.inventory import OutOfStock, reserve_stock
 from catalog.models import Product
 from cart.cart import Cart
 from payments.models import Payment
 
 
+def _checkout_key(value):
+    """The idempotency key posted with the checkout form, or None if absent/garbled."""
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _order_for_key(user, checkout_key):
+    if checkout_key is None:
+        return None
+    return Order.objects.filter(user=user, checkout_key=checkout_key).first()
+
+
+def _existing_order_redirect(order):
+    if order.payment_status == 'paid':
+        return redirect('orders:order_confirmation', order_id=order.id)
+    return redirect('payments:initialize_payment', order_id=order.id)
+
+
 @login_required
 def checkout_view(request):
     """Handle checkout and redirect to payment initialization."""
+    user = request.user
+    full_name = user.full_name
+    email = user.email
+
+    # A retried or double-clicked submit carries the same key: send it to the
+    # order the first submit created instead of writing another one.
+    checkout_key = _checkout_key(request.POST.get('checkout_key')) if request.method == 'POST' else None
+    existing = _order_for_key(user, checkout_key)
+    if existing:
+        return _existing_order_redirect(existing)
+
     cart = Cart(request)
 
     if not cart or len(cart) == 0:
+        # The first submit commits the order before it empties the cart, so
+        # look again: a concurrent duplicate may have just lost that race.
+        existing = _order_for_key(user, checkout_key)
+        if existing:
+            return _existing_order_redirect(existing)
         messages.warning(request, "Your cart is empty.")
         return redirect('catalog:product_list')
 
-    user = request.user
-    full_name = user.full_name
-    email = user.email
+    context = {
+        'cart': cart,
+        'user_full_name': full_name,
+        'delivery_fee': cart.get_delivery_fee(),
+        'user_email': email,
+        'checkout_key': checkout_key or uuid.uuid4(),
+    }
 
     if request.method == 'POST':
         phone = request.POST.get('phone')
@@ -29,45 +77,59 @@ def checkout_view(request):
 
         if not all([address, city]):
             messages.error(request, "Please fill in all required fields.")
-            return render(request, 'orders/checkout.html', {
-                'cart': cart,
-                'user_full_name': full_name,
-                'user_email': email,
-            })
-
-        # Create order
-        order = Order.objects.create(
-            user=user,
-            full_name=full_name,
-            email=email,
-            phone=phone,
-            address=address,
-            city=city,
-            total_price=cart.get_total_price(),
-            status='pending',
-            payment_status='unpaid'
-        )
-
-        for item in cart:
-            OrderItem.objects.create(
-                order=order,
-                product=item['product'],
-                size=item.get('size'),
-                quantity=item['quantity'],
-                price=item['price_ngn']
-            )
+            return render(request, 'orders/checkout.html', context)
+
+        items = list(cart)
+        reserved_until = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+        try:
+            with transaction.atomic():
+                # Create order. The (user, checkout_key) constraint makes a
+                # concurrent duplicate submit fail here, before it writes items or takes stock.
+                order = Order.objects.create(
+                    user=user,
+                    full_name=full_name,
+                    email=email,
+                    phone=phone,
+                    address=address,
+                    city=city,
+                    total_price=cart.get_total_price(),
+                    status='pending',
+                    payment_status='unpaid',
+                    reserved_until=reserved_until,
+                    checkout_key=checkout_key,
+                )
+
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product=item['product'],
+                        size=item.get('size'),
+                        quantity=item['quantity'],
+                        price=item['price_ngn']
+                    )
+                    for item in items
+                ])
+
+                # Reserve stock last so the stock rows stay locked only until commit.
+                reserve_stock(
+                    (item['product'].id, item.get('size'), item['quantity']) for item in items
+                )
+        except IntegrityError:
+            existing = _order_for_key(user, checkout_key)
+            if existing is None:
+                raise
+            return _existing_order_redirect(existing)
+        except OutOfStock as e:
+            product = next(item['product'] for item in items if item['product'].id == e.product_id)
+            messages.error(request, f"Sorry, {product.title} in size {e.size} is out of stock or has fewer pairs left than you asked for.")
+            return redirect('cart:cart_detail')
 
         # Clear cart after order
         cart.clear()
 
         return redirect('payments:initialize_payment', order_id=order.id)
 
-    return render(request, 'orders/checkout.html', {
-        'cart': cart,
-        'user_full_name': full_name,
-        'delivery_fee': cart.get_delivery_fee(),
-        'user_email': email,
-    })
+    return render(request, 'orders/checkout.html', context)
 
 
 @login_required
@@ -86,9 +148,34 @@ def cancel_order_view(request, order_id):
         messages.error(request, "You cannot cancel an order that has been paid or processed.")
         return redirect('orders:order_confirmation', order_id=order.id)
 
-    order.status = 'cancelled'
-    order.payment_status = 'failed'
-    order.save()
+    order.cancel()
 
     messages.success(request, "Order cancelled successfully.")
     return redirect('accounts:dashboard')
+
+
+REPORT_DAYS = 30
+# Dates outside this range are typos (and the far ends overflow date arithmetic).
+REPORT_RANGE = (date(2000, 1, 1), date(2999, 12, 31))
+
+
+def _report_date(request, name, default):
+    try:
+        day = datetime.strptime(request.GET.get(name, ''), '%Y-%m-%d').date()
+    except ValueError:
+        return default
+    low, high = REPORT_RANGE
+    return day if low <= day <= high else default
+
+
+@staff_member_required
+def sales_report_view(request):
+    """Sales by day, product, city and size, read from the daily rollups."""
+    today = timezone.localdate()
+    end = _report_date(request, 'to', today)
+    start = _report_date(request, 'from', end - timedelta(days=REPORT_DAYS - 1))
+    if start > end:
+        start, end = end, start
+
+    context = {'start': start, 'end': end, **sales_report(start, end)}
+    return render(request, 'orders/sales_report.html', context)
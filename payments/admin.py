@@ -1,7 +1,18 @@
 from django.contrib import admin
-from .models import Payment
+from .models import Payment, PaymentEvent
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('order', 'user', 'amount', 'verified', 'created_at')
     list_filter = ('verified', 'created_at')
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'reference', 'received_at', 'processed_at')
+    list_filter = ('event',)
+    search_fields = ('=reference',)
+    readonly_fields = ('key', 'event', 'reference', 'payload', 'received_at', 'processed_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -11,3 +11,20 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment for Order {self.order.id} - {'Verified' if self.verified else 'Pending'}"
+
+
+class PaymentEvent(models.Model):
+    """
+    A webhook event received from Paystack. The unique event key makes a
+    redelivered event a no-op; processed_at is set once the job queue has
+    acted on it.
+    """
+    key = models.CharField(max_length=150, unique=True, help_text="Event type and Paystack transaction id")
+    event = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event} {self.reference}"
@@ -0,0 +1,45 @@
+"""
+What the browser callback (verify_payment) and the Paystack webhook share:
+checking a webhook signature and recording a successful charge.
+"""
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Payment
+from .tasks import notify_order_paid
+
+logger = logging.getLogger(__name__)
+
+
+def signature_is_valid(body, signature):
+    """Paystack signs the raw request body with HMAC-SHA512 keyed by the secret key."""
+    if not settings.PAYSTACK_SECRET_KEY or not signature:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    # Header values can hold any Latin-1 text; compare bytes so odd input is just a mismatch.
+    return hmac.compare_digest(expected.encode(), signature.encode('utf-8', 'replace'))
+
+
+def record_successful_charge(order, amount_kobo, admin_url):
+    """
+    Mark the order paid for a successful Paystack charge of `amount_kobo`.
+    Only the caller that performs the transition queues the receipt and
+    shop alerts, so the callback and the webhook can both report the same
+    charge. Returns False if the charge does not cover the order.
+    """
+    if amount_kobo is not None and int(amount_kobo) < int(order.total_price * 100):
+        logger.error(
+            "Paystack charge %s for order #%s was %s kobo, less than the order total %s.",
+            order.reference, order.pk, amount_kobo, order.total_price,
+        )
+        return False
+
+    with transaction.atomic():
+        if order.mark_paid():
+            notify_order_paid(order, admin_url)
+        Payment.objects.filter(reference=order.reference).update(verified=True)
+    return True
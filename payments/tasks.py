@@ -0,0 +1,101 @@
+import logging
+from urllib.parse import urljoin
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from jobs.queue import task
+from orders.models import Order
+from shoestore.mail import send_email
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def send_payment_receipt(order_id):
+    """Customer receipt for a paid order (Resend)."""
+    order = Order.objects.get(pk=order_id)
+    html_content = render_to_string("emails/payment_receipt.html", {"order": order})
+    send_email({
+        "from": "rareleather@rareleather.com.ng",
+        "to": [order.email],
+        "subject": f"Payment Receipt — Order #{order.id}",
+        "html": html_content,
+        "text": strip_tags(html_content),
+    })
+
+
+@task
+def send_new_order_alert(order_id, admin_url):
+    """Tell the shop a paid order came in (Resend)."""
+    if not settings.ADMIN_EMAIL:
+        # Fail the job so the missed alert shows up as dead in the admin.
+        raise ImproperlyConfigured(f"ADMIN_EMAIL is not set; cannot send the alert for order #{order_id}.")
+    order = Order.objects.get(pk=order_id)
+    admin_html = render_to_string("emails/admin_new_order.html", {
+        "order": order,
+        "admin_url": admin_url,
+        "now": timezone.now(),
+    })
+    send_email({
+        "from": "noreply@rareleather.com.ng",
+        "to": [settings.ADMIN_EMAIL],
+        "subject": f"🟢 New Paid Order — #{order.id}",
+        "html": admin_html,
+        "text": strip_tags(admin_html),
+    })
+
+
+@task
+def send_telegram_order_alert(order_id):
+    """Post a paid order to the shop's Telegram chat, if one is configured."""
+    if not (getattr(settings, "TELEGRAM_BOT_TOKEN", None) and getattr(settings, "TELEGRAM_CHAT_ID", None)):
+        return
+    order = Order.objects.get(pk=order_id)
+    telegram_message = (
+        f"✅ *New Paid Order!*\n"
+        f"📦 Order ID: {order.id}\n"
+        f"👤 Customer: {order.full_name}\n"
+        f"💰 Amount: ₦{order.total_price:,.2f}\n"
+        f"📧 {order.email}\n"
+        f"🔗 Ref: {order.reference}"
+    )
+    response = requests.post(
+        f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
+        data={
+            "chat_id": settings.TELEGRAM_CHAT_ID,
+            "text": telegram_message,
+            "parse_mode": "Markdown",
+        },
+        timeout=5,
+    )
+    response.raise_for_status()
+
+
+def notify_order_paid(order, admin_url):
+    """Queue the receipt and the shop alerts for a newly paid order."""
+    send_payment_receipt.enqueue(order_id=order.id)
+    send_new_order_alert.enqueue(order_id=order.id, admin_url=admin_url)
+    send_telegram_order_alert.enqueue(order_id=order.id)
+
+
+@task
+def process_charge_success(event_id, site_url):
+    """Record the payment from a charge.success webhook event."""
+    from .models import PaymentEvent
+    from .paystack import record_successful_charge
+
+    stored = PaymentEvent.objects.get(pk=event_id)
+    data = stored.payload["data"]
+    order = Order.objects.filter(reference=stored.reference).first() if stored.reference else None
+    if order is None:
+        logger.warning("Paystack charge %s does not match any order.", stored.reference or data.get("id"))
+    elif data.get("status", "success") == "success":
+        admin_url = urljoin(site_url, reverse('admin:orders_order_change', args=[order.id]))
+        record_successful_charge(order, data.get("amount"), admin_url)
+    PaymentEvent.objects.filter(pk=stored.pk).update(processed_at=timezone.now())
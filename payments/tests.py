@@ -1,3 +1,144 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog.models import Product
+from jobs.models import Job
+from jobs.queue import claim, run
+from orders.models import Order, OrderItem
+
+from .models import PaymentEvent
+from .tasks import send_new_order_alert
+
+SECRET_KEY = 'sk_test_webhook'
+
+
+def sign(body, key=SECRET_KEY):
+    return hmac.new(key.encode(), body, hashlib.sha512).hexdigest()
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET_KEY)
+class WebhookSignatureTests(TestCase):
+    url = reverse('payments:paystack_webhook')
+    body = json.dumps({'event': 'charge.success', 'data': {'id': 1, 'reference': 'ORD-1-abc'}}).encode()
+
+    def post(self, body, signature):
+        return self.client.post(self.url, body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature)
+
+    def test_signed_event_is_stored(self):
+        self.assertEqual(self.post(self.body, sign(self.body)).status_code, 200)
+        self.assertTrue(PaymentEvent.objects.filter(key='charge.success:1').exists())
+
+    def test_wrong_key_is_rejected(self):
+        self.assertEqual(self.post(self.body, sign(self.body, 'sk_test_other')).status_code, 401)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_missing_signature_is_rejected(self):
+        response = self.client.post(self.url, self.body, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_non_ascii_signature_is_rejected(self):
+        self.assertEqual(self.post(self.body, 'é').status_code, 401)
+
+    def test_malformed_event_is_a_bad_request(self):
+        body = b'{"event": "charge.success"}'
+        self.assertEqual(self.post(body, sign(body)).status_code, 400)
+
+
+def make_order(email='ada@example.com', total=50_000):
+    user = get_user_model().objects.create_user(email=email, password='pw')
+    product = Product.objects.create(title='Runner', price_ngn=total)
+    order = Order.objects.create(
+        user=user, full_name='Ada Obi', email=email, phone='08000000000', address='1 Marina',
+        city='Lagos', total_price=total, reference=f'ORD-{user.pk}-abc',
+    )
+    OrderItem.objects.create(order=order, product=product, size=42, quantity=1, price=total)
+    return order
+
+
+def run_queued_jobs():
+    """Run every job that is due, once each; returns {task name: status}."""
+    outcomes = {}
+    while job := claim(['default']):
+        outcomes[job.task.rsplit('.', 1)[-1]] = run(job)
+    return outcomes
+
+
+@mock.patch('payments.tasks.send_email')
+class NewOrderAlertTests(TestCase):
+    def setUp(self):
+        self.order = make_order()
+        send_new_order_alert.enqueue(order_id=self.order.pk, admin_url='https://example.com/admin/')
+
+    @override_settings(ADMIN_EMAIL='shop@example.com')
+    def test_alert_goes_to_the_admin_address(self, send_email):
+        self.assertEqual(run_queued_jobs(), {'send_new_order_alert': Job.DONE})
+        self.assertEqual(send_email.call_args.args[0]['to'], ['shop@example.com'])
+
+    @override_settings(ADMIN_EMAIL=None)
+    def test_alert_fails_without_an_admin_address(self, send_email):
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(run_queued_jobs(), {'send_new_order_alert': Job.QUEUED})
+        send_email.assert_not_called()
+        self.assertIn('ADMIN_EMAIL is not set', Job.objects.get().last_error)
+
+
+CHARGE_SUCCESS = Path(__file__).resolve().parent / 'fixtures' / 'paystack' / 'charge_success.json'
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET_KEY, ADMIN_EMAIL='shop@example.com', TELEGRAM_BOT_TOKEN=None)
+@mock.patch('payments.tasks.send_email')
+class WebhookDeliveryTests(TestCase):
+    """Paystack retries webhooks; each charge is recorded, and announced, once."""
+
+    def setUp(self):
+        self.order = make_order()
+
+    def deliver(self, event_id=4099260516, amount=None, times=1):
+        payload = json.loads(CHARGE_SUCCESS.read_text())
+        payload['data'].update(
+            id=event_id, reference=self.order.reference,
+            amount=int(self.order.total_price * 100) if amount is None else amount,
+        )
+        body = json.dumps(payload).encode()
+        for _ in range(times):
+            response = self.client.post(
+                reverse('payments:paystack_webhook'), body, content_type='application/json',
+                HTTP_X_PAYSTACK_SIGNATURE=sign(body),
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_redelivered_event_is_stored_and_queued_once(self, send_email):
+        self.deliver(times=3)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+        self.assertEqual(Job.objects.filter(task__endswith='.process_charge_success').count(), 1)
+
+    def test_charge_is_announced_once(self, send_email):
+        self.deliver(times=2)
+        self.deliver(event_id=4099260517)
+        outcomes = run_queued_jobs()
+
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.payment_status, self.order.status), ('paid', 'processing'))
+        self.assertEqual(outcomes, {
+            'process_charge_success': Job.DONE, 'send_payment_receipt': Job.DONE,
+            'send_new_order_alert': Job.DONE, 'send_telegram_order_alert': Job.DONE,
+        })
+        self.assertEqual(Job.objects.filter(task__endswith='.process_charge_success').count(), 2)
+        self.assertEqual(Job.objects.exclude(task__endswith='.process_charge_success').count(), 3)
+        self.assertEqual(send_email.call_count, 2)
+        self.assertFalse(PaymentEvent.objects.filter(processed_at=None).exists())
+
+    def test_short_charge_leaves_the_order_unpaid(self, send_email):
+        self.deliver(amount=100)
+        with self.assertLogs('payments.paystack', 'ERROR'):
+            run_queued_jobs()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'pending')
+        send_email.assert_not_called()
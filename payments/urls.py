@@ -6,4 +6,5 @@ app_name = 'payments'
 urlpatterns = [
     path('initialize/<int:order_id>/', views.initialize_payment, name='initialize_payment'),
     path('verify/', views.verify_payment, name='verify_payment'),  # ✅ FIXED
+    path('webhook/paystack/', views.paystack_webhook, name='paystack_webhook'),
 ]
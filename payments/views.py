@@ -1,22 +1,23 @@
+import json
 import uuid
 import requests
 import logging
-import resend
 from django.conf import settings
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.urls import reverse
 from orders.models import Order
-from .models import Payment
+from .models import Payment, PaymentEvent
+from .paystack import record_successful_charge, signature_is_valid
+from .tasks import process_charge_success
 
 logger = logging.getLogger(__name__)
 
-# Initialize Resend client
-resend.api_key = settings.RESEND_API_KEY
-
 
 @login_required
 def initialize_payment(request, order_id):
@@ -27,6 +28,10 @@ def initialize_payment(request, order_id):
         messages.info(request, "This order has already been paid for.")
         return redirect('orders:order_confirmation', order_id=order.id)
 
+    if order.status == 'cancelled':
+        messages.error(request, "This order was cancelled and its items released. Please check out again.")
+        return redirect('orders:order_confirmation', order_id=order.id)
+
     # Generate unique reference
     reference = f"ORD-{order.id}-{uuid.uuid4().hex[:8]}"
     order.reference = reference
@@ -86,7 +91,7 @@ def initialize_payment(request, order_id):
 
 @login_required
 def verify_payment(request):
-    """Verify Paystack transaction and send notifications via Resend."""
+    """Verify a Paystack transaction; receipts and alerts go out from the job queue."""
     reference = request.GET.get('reference') or request.GET.get('trxref')
 
     if not reference:
@@ -108,83 +113,46 @@ def verify_payment(request):
         messages.error(request, "Network error verifying payment.")
         return redirect('orders:order_confirmation', order_id=order.id)
 
-    payment = Payment.objects.filter(reference=reference).first()
-
     # ✅ Successful Payment
     if res_data.get("status") and res_data["data"]["status"] == "success":
-        order.payment_status = "paid"
-        order.status = "processing"
-        order.save(update_fields=["payment_status", "status"])
-
-        if payment:
-            payment.verified = True
-            payment.save(update_fields=["verified"])
-
-        # === 📧 CUSTOMER RECEIPT (Resend) ===
-        try:
-            subject = f"Payment Receipt — Order #{order.id}"
-            html_content = render_to_string("emails/payment_receipt.html", {"order": order})
-            text_content = strip_tags(html_content)
-
-            resend.Emails.send({
-                "from": "rareleather@rareleather.com.ng",
-                "to": [order.email],
-                "subject": subject,
-                "html": html_content,
-                "text": text_content
-            })
-        except Exception as e:
-            logger.error(f"Error sending customer receipt via Resend: {e}")
-
-        # === 📧 ADMIN ALERT (Resend) ===
-        try:
-            admin_subject = f"🟢 New Paid Order — #{order.id}"
-            admin_context = {
-                "order": order,
-                "admin_url": request.build_absolute_uri(f"/admin/orders/order/{order.id}/"),
-                "now": timezone.now(),
-            }
-            admin_html = render_to_string("emails/admin_new_order.html", admin_context)
-            admin_text = strip_tags(admin_html)
-
-            resend.Emails.send({
-                "from": "noreply@rareleather.com.ng",
-                "to": [settings.ADMIN_EMAIL],
-                "subject": admin_subject,
-                "html": admin_html,
-                "text": admin_text
-            })
-        except Exception as e:
-            logger.error(f"Error sending admin notification via Resend: {e}")
-
-        # === 💬 Telegram Alert (Optional) ===
-        if getattr(settings, "TELEGRAM_BOT_TOKEN", None) and getattr(settings, "TELEGRAM_CHAT_ID", None):
-            telegram_message = (
-                f"✅ *New Paid Order!*\n"
-                f"📦 Order ID: {order.id}\n"
-                f"👤 Customer: {order.full_name}\n"
-                f"💰 Amount: ₦{order.total_price:,.2f}\n"
-                f"📧 {order.email}\n"
-                f"🔗 Ref: {order.reference}"
-            )
-            try:
-                requests.post(
-                    f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
-                    data={
-                        "chat_id": settings.TELEGRAM_CHAT_ID,
-                        "text": telegram_message,
-                        "parse_mode": "Markdown",
-                    },
-                    timeout=5,
-                )
-            except Exception as e:
-                logger.error(f"Telegram notification failed: {e}")
+        admin_url = request.build_absolute_uri(reverse('admin:orders_order_change', args=[order.id]))
+        if not record_successful_charge(order, res_data["data"].get("amount"), admin_url):
+            messages.error(request, "The amount paid does not match this order. Please contact us.")
+            return redirect('orders:order_confirmation', order_id=order.id)
 
         messages.success(request, "Payment verified successfully! Your order is now processing.")
         return redirect('orders:order_confirmation', order_id=order.id)
 
-    # ❌ Failed Payment
-    order.payment_status = "failed"
-    order.save(update_fields=["payment_status"])
+    # ❌ Failed Payment (never overwrites a payment the webhook already recorded)
+    Order.objects.filter(pk=order.pk).exclude(payment_status="paid").update(payment_status="failed")
     messages.warning(request, "Payment verification failed or was incomplete.")
     return redirect('orders:order_confirmation', order_id=order.id)
+
+
+@csrf_exempt
+@require_POST
+def paystack_webhook(request):
+    """
+    Paystack event notifications. Checks the signature, stores the event
+    once, queues charge.success for the job queue and answers straight
+    away; Paystack redelivers anything that does not get a 200.
+    """
+    if not signature_is_valid(request.body, request.headers.get("x-paystack-signature")):
+        return HttpResponse(status=401)
+    try:
+        payload = json.loads(request.body)
+        event, data = payload["event"], payload["data"]
+        key = f"{event}:{data['id']}"
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest("Malformed event")
+
+    try:
+        with transaction.atomic():
+            stored = PaymentEvent.objects.create(
+                key=key, event=event, reference=data.get("reference") or "", payload=payload
+            )
+            if event == "charge.success":
+                process_charge_success.enqueue(event_id=stored.id, site_url=request.build_absolute_uri("/"))
+    except IntegrityError:
+        pass  # Already received; this is a redelivery.
+    return HttpResponse(status=200)
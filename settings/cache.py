@@ -0,0 +1,52 @@
+"""
+Cached SiteSettings singleton.
+
+The settings row is memoized in each process and shared through the cache
+under a version number. Saving or deleting it in the admin bumps the
+version, so every worker reloads on its next request; until then a lookup
+costs one cache read and no query.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'site_settings:version'
+CACHE_KEY = 'site_settings:{version}'
+
+_MISSING = object()
+# (version, settings) for this process; replaced as a whole, so thread-safe.
+_memo = (None, None)
+
+
+def site_settings_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time()), None)
+        version = cache.get(VERSION_KEY, int(time.time()))
+    return version
+
+
+def bump_site_settings_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time()), None)
+
+
+def get_site_settings():
+    """The SiteSettings row (or None if it has not been created yet)."""
+    global _memo
+    from .models import SiteSettings
+
+    version = site_settings_version()
+    memo_version, memo_value = _memo
+    if memo_version == version:
+        return memo_value
+
+    key = CACHE_KEY.format(version=version)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = SiteSettings.objects.first()
+        cache.set(key, value, None)
+    _memo = (version, value)
+    return value
@@ -1,7 +1,10 @@
 # shoestore/context_processors.py
-from settings.models import SiteSettings  # assuming your SiteSettings model is in the 'settings' app
+from django.utils.functional import SimpleLazyObject
+
+from settings.cache import get_site_settings
+
 
 def site_settings(request):
     """Add site settings (like social links) to all templates."""
-    settings = SiteSettings.objects.first()
-    return {'site_settings': settings}
+    # Lazy, so pages that never mention site_settings never look it up.
+    return {'site_settings': SimpleLazyObject(get_site_settings)}
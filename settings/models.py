@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_site_settings_version
 
 class SiteSettings(models.Model):
     delivery_fee = models.DecimalField(
@@ -21,3 +25,9 @@ class SiteSettings(models.Model):
     class Meta:
         verbose_name = "Site Setting"
         verbose_name_plural = "Site Settings"
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def invalidate_site_settings(sender, **kwargs):
+    bump_site_settings_version()
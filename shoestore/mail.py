@@ -0,0 +1,13 @@
+"""
+Email through Resend, for the background tasks that send it. The API key
+is set here, once, rather than by each task module.
+"""
+import resend
+from django.conf import settings
+
+resend.api_key = settings.RESEND_API_KEY
+
+
+def send_email(message):
+    """Send one message: a dict of from, to, subject, html and text."""
+    return resend.Emails.send(message)
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'catalog',
     'payments',
     'settings',
+    'jobs',
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -46,6 +47,7 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'resend'
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY")  # Store your API key securely
 DEFAULT_FROM_EMAIL = 'noreply@rareleather.com.ng'  # Replace with your domain
+ADMIN_EMAIL = config('ADMIN_EMAIL', default=None)  # Where paid-order alerts go
 
 # PAYSTACK
 PAYSTACK_PUBLIC_KEY = os.environ.get("PAYSTACK_PUBLIC_KEY")
@@ -56,6 +58,16 @@ PAYSTACK_CALLBACK_URL = os.environ.get("PAYSTACK_CALLBACK_URL")
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 
+# CART
+# Where carts are kept (see cart/storage.py): a signed cookie for visitors,
+# the database for signed-in users so their cart follows them across devices.
+CART_ANONYMOUS_STORAGE = 'cart.storage.SignedCookieCartStorage'
+CART_USER_STORAGE = 'cart.storage.DatabaseCartStorage'
+
+# STOCK
+# How long an unpaid order holds its stock before release_expired_reservations frees it
+STOCK_RESERVATION_MINUTES = config('STOCK_RESERVATION_MINUTES', default=30, cast=int)
+
 # MIDDLEWARE
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -65,6 +77,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'cart.middleware.CartStorageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -98,6 +111,24 @@ DATABASES = {
     )
 }
 
+# CACHE
+# Catalog and site-settings invalidation bumps version keys in this cache, so
+# with several workers it must be shared: set REDIS_URL in production.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 CSRF_TRUSTED_ORIGINS = [
     'https://rare-leather-production.up.railway.app',
     'https://rareleather.com.ng',
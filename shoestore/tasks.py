@@ -0,0 +1,24 @@
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from jobs.queue import task
+
+from .mail import send_email
+
+
+@task
+def send_contact_message(name, email, message):
+    """Forward a contact form message to the team inbox (Resend)."""
+    html_content = render_to_string("emails/contact_message.html", {
+        "name": name,
+        "email": email,
+        "message": message,
+    })
+    send_email({
+        "from": "noreply@rareleather.com.ng",
+        "to": "rareleatherteam@gmail.com",  # Send to your admin inbox
+        "reply_to": [email],  # So you can reply directly to the sender
+        "subject": f"New Contact Message from {name}",
+        "html": html_content,
+        "text": strip_tags(html_content),
+    })
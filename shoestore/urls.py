@@ -37,6 +37,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('account/', include('accounts.urls', namespace="accounts" )),
     path('products/', include('catalog.urls', namespace="catalog" )),
+    path('api/catalog/', include('catalog.api_urls', namespace='catalog_api')),
     path('cart/', include('cart.urls', namespace='cart')),
     path('payments/', include(('payments.urls', 'payments'), namespace='payments')),
     path('orders/', include(('orders.urls', 'orders'), namespace='orders')),
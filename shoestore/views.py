@@ -1,14 +1,7 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-import resend
-from catalog.models import Product
-from django.db.models.functions import Random
-
-# Initialize Resend
-resend.api_key = settings.RESEND_API_KEY
+from catalog.featured import featured_products
+from .tasks import send_contact_message
 
 
 def about_view(request):
@@ -21,30 +14,8 @@ def contact_view(request):
         email = request.POST.get("email")
         message = request.POST.get("message")
 
-        subject = f"New Contact Message from {name}"
-
-        # Render a proper HTML email template if you have one (optional)
-        html_content = render_to_string("emails/contact_message.html", {
-            "name": name,
-            "email": email,
-            "message": message,
-        })
-        text_content = strip_tags(html_content)
-
-        try:
-            # Send email via Resend
-            resend.Emails.send({
-                "from": "noreply@rareleather.com.ng",
-                "to": "rareleatherteam@gmail.com",  # Send to your admin inbox
-                "reply_to": [email],  # So you can reply directly to the sender
-                "subject": subject,
-                "html": html_content,
-                "text": text_content,
-            })
-
-            messages.success(request, "Your message has been sent successfully!")
-        except Exception as e:
-            messages.error(request, f"There was an error sending your message: {e}")
+        send_contact_message.enqueue(name=name, email=email, message=message)
+        messages.success(request, "Your message has been sent successfully!")
 
         return redirect("contact")
 
@@ -52,11 +23,9 @@ def contact_view(request):
 
 
 def home(request):
-    # Get 4 random featured products
-    featured_products = Product.objects.order_by(Random())[:4]
-
+    # 4 featured products, rotated every few minutes (see catalog.featured)
     context = {
-        'featured_products': featured_products,
+        'featured_products': featured_products(),
     }
     return render(request, "home.html", context)
 